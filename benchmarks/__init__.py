@@ -0,0 +1,16 @@
+import os
+
+for name in [
+    "DISCORD_CODE",
+    "DISCORD_CLIENT_ID",
+    "DISCORD_CLIENT_SECRET",
+    "DISCORD_REDIRECT_URI",
+    "DISCORD_BOT_TOKEN",
+    "YOUTUBE_CHANNEL_ID",
+    "YOUTUBE_API_KEY",
+    "YOUTUBE_CLIENT_ID",
+    "YOUTUBE_CLIENT_SECRET",
+    "YOUTUBE_REFRESH_TOKEN",
+]:
+    os.environ.setdefault(name, "benchmark")
+os.environ.setdefault("DISCORD_GUILD_ID", "0")
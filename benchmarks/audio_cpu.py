@@ -0,0 +1,93 @@
+import argparse
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import benchmarks  # noqa: F401
+import discord.opus
+from discord import FFmpegPCMAudio
+from discord_api.src import OggOpusAudio
+
+FRAME_SECONDS = 0.02
+
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def prepare_tracks(directory: Path, seconds: int, source: Path | None) -> dict[str, Path]:
+    if source is None:
+        source_options = ["-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}", "-ac", "2"]
+    else:
+        source_options = ["-i", str(source), "-t", str(seconds)]
+    tracks = {"mp3": directory / "track.mp3", "opus": directory / "track.opus"}
+    encoders = {"mp3": ["-c:a", "libmp3lame", "-b:a", "192k"], "opus": ["-c:a", "libopus", "-b:a", "128k", "-ar", "48000"]}
+    for name, path in tracks.items():
+        subprocess.run(
+            ["ffmpeg", "-loglevel", "error", "-y", *source_options, "-vn", *encoders[name], str(path)], check=True
+        )
+    return tracks
+
+
+def create_source(track_format: str, path: Path):
+    if track_format == "opus":
+        return OggOpusAudio(path)
+    return FFmpegPCMAudio(str(path))
+
+
+def play(track_format: str, path: Path, streams: int) -> tuple[float, float, float]:
+    # Read every stream to the end the way discord.py's AudioPlayer does, encoding PCM frames to Opus
+    sources = [create_source(track_format, path) for _ in range(streams)]
+    encoders = [discord.opus.Encoder() for _ in range(streams)]
+    frames = 0
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    active = list(zip(sources, encoders))
+    while active:
+        still_active = []
+        for source, encoder in active:
+            data = source.read()
+            if not data:
+                source.cleanup()
+                continue
+            if not source.is_opus():
+                encoder.encode(data, encoder.SAMPLES_PER_FRAME)
+            frames += 1
+            still_active.append((source, encoder))
+        active = still_active
+    cpu, wall = cpu_seconds() - cpu_start, time.perf_counter() - wall_start
+    return cpu, wall, frames * FRAME_SECONDS
+
+
+def main(seconds: int, streams: int, source: Path | None):
+    if shutil.which("ffmpeg") is None:
+        sys.exit("ffmpeg is required to build the test tracks")
+    if not discord.opus.is_loaded() and not discord.opus._load_default():
+        sys.exit("libopus is required to encode PCM frames")
+    with tempfile.TemporaryDirectory(prefix="fakabot-audio-cpu-") as directory:
+        tracks = prepare_tracks(directory=Path(directory), seconds=seconds, source=source)
+        print(f"{streams} concurrent streams of a {seconds}s track")
+        results = {}
+        for track_format, path in tracks.items():
+            cpu, wall, audio_seconds = play(track_format=track_format, path=path, streams=streams)
+            results[track_format] = cpu / audio_seconds
+            print(
+                f"{track_format:>4}: {cpu:.2f}s CPU in {wall:.2f}s wall for {audio_seconds:.0f}s of audio, "
+                f"{100 * cpu / audio_seconds:.3f}% of a core per stream, {path.stat().st_size / seconds / 1024:.1f} KiB/s"
+            )
+        if results["opus"]:
+            print(f"opus pass-through uses {results['mp3'] / results['opus']:.0f}x less CPU per stream")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare CPU per voice stream for MP3 and Ogg Opus cached tracks")
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--source", type=Path, default=None, help="audio file to use instead of a generated tone")
+    args = parser.parse_args()
+    main(seconds=args.seconds, streams=args.streams, source=args.source)
@@ -0,0 +1,92 @@
+import argparse
+import random
+import timeit
+
+import benchmarks  # noqa: F401
+from discord_api.models import COMMANDS, Command
+from discord_api.src import CommandParser
+
+START_KEYWORDS = ["faka ", "f "]
+
+CHATTER = [
+    "jajaja",
+    "alguien juega hoy?",
+    "fijate lo que pasó ayer",
+    "fue terrible el partido",
+    "f",
+    "faka",
+    "ok",
+    "nos vemos a las 10",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "no me digas",
+    "para qué?",
+]
+COMMAND_MESSAGES = [
+    "faka play never gonna give you up",
+    "f pone https://youtu.be/dQw4w9WgXcQ",
+    "faka skip",
+    "f sig",
+    "faka queue",
+    "faka deja de joder",
+    "faka lavate la cola",
+    "f pausa",
+    "faka dale",
+    "faka nothing to see here",
+]
+
+
+def legacy_get_command(content: str) -> Command | None:
+    content = content.strip()
+    start_keyword = None
+    for keyword in START_KEYWORDS:
+        if content.casefold().startswith(keyword):
+            start_keyword = keyword
+            break
+    if start_keyword is None:
+        return None
+    for command, options in COMMANDS.items():
+        for option in options:
+            if content.casefold().startswith(f"{start_keyword}{option}"):
+                return Command(action=command, query=content[len(start_keyword) + len(option):].strip())
+    return None
+
+
+def parser_get_command(parser: CommandParser, content: str) -> Command | None:
+    content = content.strip()
+    if not parser.is_triggered(content):
+        return None
+    return parser.parse(content)
+
+
+def build_corpus(size: int, command_ratio: float) -> list[str]:
+    rng = random.Random(0)
+    return [
+        rng.choice(COMMAND_MESSAGES) if rng.random() < command_ratio else rng.choice(CHATTER)
+        for _ in range(size)
+    ]
+
+
+def main(size: int, command_ratio: float, repeat: int):
+    corpus = build_corpus(size=size, command_ratio=command_ratio)
+    parser = CommandParser(start_keywords=START_KEYWORDS, commands=COMMANDS)
+    implementations = {
+        "legacy": lambda: [legacy_get_command(content) for content in corpus],
+        "parser": lambda: [parser_get_command(parser, content) for content in corpus],
+    }
+    print(f"{size} messages, {command_ratio:.0%} commands")
+    for name, run in implementations.items():
+        best = min(timeit.repeat(run, number=1, repeat=repeat))
+        print(f"{name:<8} {best / size * 1e9:>10,.0f} ns/message")
+    for content in COMMAND_MESSAGES:
+        legacy, parsed = legacy_get_command(content), parser_get_command(parser, content)
+        if legacy != parsed:
+            print(f"differs: {content!r}: legacy={legacy} parser={parsed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-message command dispatch cost")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--command-ratio", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(size=args.messages, command_ratio=args.command_ratio, repeat=args.repeat)
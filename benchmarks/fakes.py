@@ -0,0 +1,373 @@
+import functools
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import wave
+import zlib
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+from pyyoutube import PyYouTubeException
+from pyyoutube.error import ErrorMessage
+from pyyoutube.models import PlaylistItemListResponse, SearchListResponse, VideoListResponse
+from yt_dlp.utils import DownloadError
+
+from youtube_api.api import YoutubeApi
+from youtube_api.src import DataApiBackend, MetadataRouter, YtDlpBackend
+
+
+class FakeAudioSource:
+    def __init__(self, source, *args, **kwargs):
+        self.source = source
+
+    def read(self) -> bytes:
+        return bytes(3840)
+
+    def is_opus(self) -> bool:
+        return False
+
+    def cleanup(self):
+        pass
+
+
+class FakeVoiceClient:
+    def __init__(self, channel: "FakeVoiceChannel"):
+        self.channel = channel
+        self.source = None
+        self.after = None
+        self.playing = False
+        self.paused = False
+        self.started_at: float | None = None
+
+    def is_playing(self) -> bool:
+        return self.playing and not self.paused
+
+    def is_paused(self) -> bool:
+        return self.paused
+
+    def play(self, source, *, after=None, **kwargs):
+        self.source = source
+        self.after = after
+        self.playing = True
+        self.paused = False
+        self.started_at = time.perf_counter()
+        source.read()
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def stop(self):
+        if not self.playing:
+            return
+        self.playing = False
+        self.paused = False
+        after, self.after = self.after, None
+        if after is not None:
+            thread = threading.Thread(target=after, args=(None,), daemon=True)
+            thread.start()
+
+    async def disconnect(self, *, force: bool = False):
+        self.stop()
+
+
+class FakeVoiceChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.voice_client = None
+
+    async def connect(self, **kwargs) -> FakeVoiceClient:
+        self.voice_client = FakeVoiceClient(channel=self)
+        return self.voice_client
+
+
+class FakeSentMessage:
+    def __init__(self, channel: "FakeTextChannel", content=None, embed=None):
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+
+    async def edit(self, **kwargs):
+        self.channel.edits += 1
+        self.content = kwargs.get("content", self.content)
+        self.embed = kwargs.get("embed", self.embed)
+        return self
+
+    async def delete(self, *, delay: float | None = None):
+        pass
+
+
+class FakeTextChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.sent: list[FakeSentMessage] = []
+        self.edits = 0
+
+    async def send(self, content=None, *, embed=None, **kwargs) -> FakeSentMessage:
+        sent = FakeSentMessage(channel=self, content=content, embed=embed)
+        self.sent.append(sent)
+        return sent
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.text_channel = FakeTextChannel(channel_id=guild_id * 10 + 1)
+        self.voice_channel = FakeVoiceChannel(channel_id=guild_id * 10 + 2)
+
+    def message(self, content: str, author_id: int = 1) -> SimpleNamespace:
+        author = SimpleNamespace(
+            id=author_id,
+            voice=SimpleNamespace(channel=self.voice_channel),
+        )
+        return SimpleNamespace(
+            content=content,
+            author=author,
+            guild=self,
+            channel=self.text_channel,
+        )
+
+
+def playlist_video_id(playlist_id: str, index: int) -> str:
+    return f"p{zlib.crc32(playlist_id.encode()) % 10**5:05d}{index:05d}"
+
+
+class FakeEndpoint:
+    def __init__(self, handler):
+        self.list = handler
+
+
+class FakeDataApi:
+    def __init__(
+        self,
+        playlist_size: int = 200,
+        latency: float = 0.0,
+        unavailable: set[str] = frozenset(),
+        quota_after: int | None = None,
+    ):
+        self.playlist_size = playlist_size
+        self.latency = latency
+        self.unavailable = unavailable
+        self.quota_after = quota_after
+        self.requests: Counter[str] = Counter()
+        self.search = FakeEndpoint(self._search)
+        self.videos = FakeEndpoint(self._videos)
+        self.playlistItems = FakeEndpoint(self._playlist_items)
+
+    def _request(self, endpoint: str):
+        if self.quota_after is not None and self.requests.total() >= self.quota_after:
+            raise PyYouTubeException(ErrorMessage(status_code=403, message="You have exceeded your quota"))
+        self.requests[endpoint] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _respond(response_type, data: dict, return_json: bool):
+        return data if return_json else response_type.from_dict(data)
+
+    def _search(self, q: str, maxResults: int = 5, return_json: bool = False, **kwargs):
+        self._request("search.list")
+        prefix = f"s{zlib.crc32(q.encode()) % 10**8:08d}"
+        items = [{"id": {"kind": "youtube#video", "videoId": f"{prefix}{index:02d}"}} for index in range(maxResults)]
+        return self._respond(SearchListResponse, {"items": items}, return_json)
+
+    def _videos(self, video_id: str, return_json: bool = False, **kwargs):
+        self._request("videos.list")
+        items = [
+            {
+                "id": item_id,
+                "snippet": {
+                    "title": f"Track {item_id}",
+                    "thumbnails": {"default": {"url": f"https://i.ytimg.com/vi/{item_id}/default.jpg"}},
+                },
+                "contentDetails": {"duration": f"PT{3 + zlib.crc32(item_id.encode()) % 4}M{zlib.crc32(item_id.encode()) % 60}S"},
+            }
+            for item_id in video_id.split(",")
+            if item_id not in self.unavailable
+        ]
+        return self._respond(VideoListResponse, {"items": items}, return_json)
+
+    def _playlist_items(
+        self, playlist_id: str, max_results: int = 50, page_token: str | None = None, return_json: bool = False, **kwargs
+    ):
+        self._request("playlistItems.list")
+        start = int(page_token or 0)
+        end = min(start + max_results, self.playlist_size)
+        items = [
+            {"snippet": {"resourceId": {"videoId": playlist_video_id(playlist_id, index)}}} for index in range(start, end)
+        ]
+        next_page_token = str(end) if end < self.playlist_size else None
+        return self._respond(PlaylistItemListResponse, {"items": items, "nextPageToken": next_page_token}, return_json)
+
+
+class FakeYtDlpBackend(YtDlpBackend):
+    # Answers flat playlist extractions the way yt-dlp does, honouring playliststart and playlistend
+    def __init__(self, data_api: FakeDataApi):
+        super().__init__()
+        self.data_api = data_api
+        self.extractions: list[dict] = []
+
+    def _extract(self, url: str, **options) -> dict:
+        self.extractions.append(options)
+        playlist_id = url.rsplit("list=", 1)[1]
+        start = options.get("playliststart", 1) - 1
+        end = min(options.get("playlistend") or self.data_api.playlist_size, self.data_api.playlist_size)
+        entries = [{"id": playlist_video_id(playlist_id, index)} for index in range(start, end)]
+        return {"id": playlist_id, "entries": entries}
+
+
+def write_silence(path: Path, seconds: float = 0.05) -> Path:
+    with wave.open(str(path), "wb") as audio:
+        audio.setnchannels(2)
+        audio.setsampwidth(2)
+        audio.setframerate(48000)
+        audio.writeframes(b"\0" * int(48000 * 4 * seconds))
+    return path
+
+
+OPUS_SILENCE = b"\xf8\xff\xfe"
+OGG_CRC_TABLE = [0] * 256
+for _index in range(256):
+    _crc = _index << 24
+    for _ in range(8):
+        _crc = ((_crc << 1) ^ 0x04C11DB7 if _crc & 0x80000000 else _crc << 1) & 0xFFFFFFFF
+    OGG_CRC_TABLE[_index] = _crc
+
+
+def ogg_page(packet: bytes, serial: int, page_number: int, granule: int, flag: int = 0) -> bytes:
+    segments = bytes([255] * (len(packet) // 255) + [len(packet) % 255])
+    header = b"OggS" + struct.pack("<BBQIIIB", 0, flag, granule, serial, page_number, 0, len(segments)) + segments
+    page = bytearray(header + packet)
+    crc = 0
+    for byte in page:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ OGG_CRC_TABLE[(crc >> 24) ^ byte]
+    page[22:26] = struct.pack("<I", crc)
+    return bytes(page)
+
+
+def write_opus_silence(path: Path, seconds: float = 0.05) -> Path:
+    serial = zlib.crc32(path.name.encode())
+    packets = [
+        b"OpusHead" + struct.pack("<BBHIhB", 1, 2, 312, 48000, 0, 0),
+        b"OpusTags" + struct.pack("<I", 7) + b"fakabot" + struct.pack("<I", 0),
+    ]
+    frames = max(1, round(seconds / 0.02))
+    with path.open("wb") as file:
+        file.write(ogg_page(packets[0], serial, 0, 0, flag=0x02))
+        file.write(ogg_page(packets[1], serial, 1, 0))
+        for frame in range(frames):
+            flag = 0x04 if frame == frames - 1 else 0
+            file.write(ogg_page(OPUS_SILENCE, serial, frame + 2, 312 + 960 * (frame + 1), flag=flag))
+    return path
+
+
+def write_opus_track(path: Path, seconds: float, packet_size: int = 300) -> Path:
+    # Numbered 20ms packets laced into full pages, so packets span pages the way long encoder pages do
+    serial = zlib.crc32(path.name.encode())
+    pre_skip = 312
+    packets = [
+        b"\xf8" + struct.pack(">I", frame) + bytes(packet_size - 5) for frame in range(max(1, round(seconds / 0.02)))
+    ]
+    segments = []
+    for frame, packet in enumerate(packets):
+        lacing = [255] * (len(packet) // 255) + [len(packet) % 255]
+        segments += [(value, frame if index == len(lacing) - 1 else None) for index, value in enumerate(lacing)]
+    body = b"".join(packets)
+    with path.open("wb") as file:
+        file.write(ogg_page(b"OpusHead" + struct.pack("<BBHIhB", 1, 2, pre_skip, 48000, 0, 0), serial, 0, 0, 0x02))
+        file.write(ogg_page(b"OpusTags" + struct.pack("<I", 7) + b"fakabot" + struct.pack("<I", 0), serial, 1, 0))
+        offset = completed = 0
+        continued = False
+        for page_number, start in enumerate(range(0, len(segments), 255), start=2):
+            page_segments = segments[start:start + 255]
+            size = sum(value for value, _frame in page_segments)
+            ended = [frame for _value, frame in page_segments if frame is not None]
+            completed += len(ended)
+            granule = pre_skip + 960 * completed if ended else -1
+            last = start + 255 >= len(segments)
+            flag = (0x01 if continued else 0) | (0x04 if last else 0)
+            header = b"OggS" + struct.pack("<BBqIIIB", 0, flag, granule, serial, page_number, 0, len(page_segments))
+            # Checksums are left at zero, neither discord.py nor the seek bisection verifies them
+            file.write(header + bytes(value for value, _frame in page_segments) + body[offset:offset + size])
+            offset += size
+            continued = page_segments[-1][1] is None
+    return path
+
+
+class FakeYoutubeDL:
+    # Stands in for yt_dlp.YoutubeDL only, so the real download options and hooks are still built and run
+    def __init__(self, audio_files: dict[str, Path], broken: frozenset[str], delays: dict[str, float], options: dict):
+        self.audio_files = audio_files
+        self.broken = broken
+        self.delays = delays
+        self.options = options
+
+    def __enter__(self) -> "FakeYoutubeDL":
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def check(self, url: str):
+        if url.rsplit("v=", 1)[-1] in self.broken:
+            raise DownloadError(f"ERROR: [youtube] {url}: Video unavailable")
+
+    def extract_info(self, url: str, download: bool = False) -> dict:
+        self.check(url)
+        return {"url": self.audio_files[".wav"].as_uri(), "acodec": "pcm_s16le", "ext": "wav"}
+
+    def download(self, urls: list[str]):
+        codec = self.options["postprocessors"][0]["preferredcodec"]
+        path = Path(f"{self.options['outtmpl']}.{codec}")
+        for url in urls:
+            self.check(url)
+            delay = self.delays.get(url.rsplit("v=", 1)[-1], 0.0)
+            deadline = time.monotonic() + delay
+            while True:
+                for hook in self.options["progress_hooks"]:
+                    hook({"status": "downloading", "filename": str(path)})
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(min(0.01, delay))
+            shutil.copyfile(self.audio_files[path.suffix], path)
+            for hook in self.options["progress_hooks"]:
+                hook({"status": "finished", "filename": str(path)})
+            for hook in self.options["postprocessor_hooks"]:
+                hook({"status": "finished", "postprocessor": "ExtractAudio"})
+
+
+def build_youtube_api(
+    data_api: FakeDataApi | None = None,
+    directory: Path | None = None,
+    cache_max_bytes: int = 256 * 1024 ** 2,
+    broken: frozenset[str] = frozenset(),
+    download_delays: dict[str, float] | None = None,
+) -> YoutubeApi:
+    directory = directory or Path(tempfile.mkdtemp(prefix="fakabot-benchmark-"))
+    api = YoutubeApi(
+        api_key="benchmark",
+        client_id="benchmark",
+        client_secret="benchmark",
+        refresh_token="benchmark",
+        channel_id="benchmark",
+        cache_max_bytes=cache_max_bytes,
+        backends=(),
+        cache_directory=directory,
+    )
+    api.data_api = data_api or FakeDataApi()
+    api.metadata = MetadataRouter(
+        backends=[DataApiBackend(name="fake", clients=[api.data_api])], record_call=api.metadata_cache.record_call
+    )
+    audio_file = write_silence(directory / "silence.wav")
+    audio_files = {".wav": audio_file, ".mp3": audio_file, ".opus": write_opus_silence(directory / "silence.opus")}
+    api._youtube_dl = functools.partial(FakeYoutubeDL, audio_files, broken, download_delays or {})
+    return api
+
+
+def video_id(guild_id: int, index: int) -> str:
+    return f"vid{guild_id % 10**4:04d}{index % 10**4:04d}"
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import benchmarks  # noqa: F401
+import discord_api.api
+from benchmarks.fakes import FakeAudioSource, FakeGuild, build_youtube_api, video_id
+from discord import Intents
+from discord_api.api import Client
+from discord_api.src import SessionStore
+from youtube_api.async_api import AsyncYoutubeApi
+
+COMMANDS = ["play", "play", "skip", "queue", "adelantar"]
+
+
+async def run_guild(client: Client, guild: FakeGuild, commands: int, latencies: dict[str, list[float]]):
+    rng = random.Random(guild.id)
+    for index in range(commands):
+        name = rng.choice(COMMANDS)
+        if name == "play":
+            content = f"faka play https://youtu.be/{video_id(guild.id, index)}"
+        else:
+            content = f"faka {name}"
+        message = guild.message(content=content)
+        start = time.perf_counter()
+        await client.on_message(message)
+        latencies[name].append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+
+
+def check_isolation(client: Client, guilds: list[FakeGuild]):
+    for guild in guilds:
+        session = client.sessions[guild.id]
+        videos = ([session.current_video] if session.current_video else []) + list(session.queue)
+        prefix = f"vid{guild.id:04d}"
+        foreign = [video.id for video in videos if not video.id.startswith(prefix)]
+        if foreign:
+            raise AssertionError(f"Guild {guild.id} has tracks from other guilds: {foreign[:5]}")
+
+
+def report(latencies: dict[str, list[float]], elapsed: float):
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} commands in {elapsed:.3f}s ({total / elapsed:,.0f} commands/s)")
+    print(f"{'command':<8} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, values in sorted(latencies.items()):
+        p50 = statistics.median(values) * 1000
+        p95 = statistics.quantiles(values, n=20)[-1] * 1000 if len(values) > 1 else p50
+        print(f"{name:<8} {len(values):>7} {p50:>9.3f} {p95:>9.3f} {max(values) * 1000:>9.3f}")
+
+
+async def main(guild_count: int, commands: int, idle_timeout: float):
+    work_directory = tempfile.TemporaryDirectory(prefix="fakabot-benchmark-")
+    youtube_api = AsyncYoutubeApi(api=build_youtube_api(directory=Path(work_directory.name)))
+    discord_api.api.FFmpegPCMAudio = FakeAudioSource
+    discord_api.api.FFmpegOpusAudio = FakeAudioSource
+    client = Client(intents=Intents.default(), youtube_api=youtube_api)
+    client.session_store = SessionStore(path=Path(work_directory.name) / "sessions.journal")
+    client.reaper.timeout = idle_timeout
+    guilds = [FakeGuild(guild_id=guild_id) for guild_id in range(1, guild_count + 1)]
+    latencies: dict[str, list[float]] = defaultdict(list)
+    start = time.perf_counter()
+    await asyncio.gather(*(run_guild(client, guild, commands, latencies) for guild in guilds))
+    elapsed = time.perf_counter() - start
+    check_isolation(client=client, guilds=guilds)
+    reaper_busy = client.reaper.stats()
+    for session in client.sessions.values():
+        session.queue.clear()
+        if session.voice_client is not None:
+            session.voice_client.stop()
+    await asyncio.sleep(idle_timeout * 2)
+    reaper_idle = client.reaper.stats()
+    report(latencies=latencies, elapsed=elapsed)
+    for name, timing in sorted(youtube_api.timings.items()):
+        print(f"youtube_api.{name}: {timing}")
+    print(f"data api requests: {dict(youtube_api.api.data_api.requests)}")
+    print(f"audio cache: {youtube_api.api.audio_cache.stats()}")
+    print(f"metadata cache: {youtube_api.api.metadata_cache.stats()}")
+    print(f"playback transitions: {client.scheduler.stats()}")
+    print(f"inactivity reaper: after commands {reaper_busy}, {idle_timeout * 2:.1f}s after stopping {reaper_idle}")
+    print(f"live tasks after shutdown: {len(asyncio.all_tasks()) - 1}")
+    print(f"session journal: {client.session_store.operations} entries")
+    sent = sum(len(guild.text_channel.sent) for guild in guilds)
+    edits = sum(guild.text_channel.edits for guild in guilds)
+    print(f"discord messages: {sent} sent, {edits} edited, status calls {dict(sorted(client.rest_calls.items()))}")
+    client.session_store.close()
+    work_directory.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate N guilds issuing play/skip/queue commands")
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--idle-timeout", type=float, default=1.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(guild_count=args.guilds, commands=args.commands, idle_timeout=args.idle_timeout))
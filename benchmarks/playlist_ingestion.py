@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import benchmarks  # noqa: F401
+import discord_api.api
+from benchmarks.fakes import FakeAudioSource, FakeDataApi, FakeGuild, build_youtube_api
+from discord import Intents
+from discord_api.api import Client
+from discord_api.src import SessionStore
+from settings import SETTINGS
+from youtube_api.async_api import AsyncYoutubeApi
+
+PLAYLIST_ID = "PLbenchmark0000000000000000000000"
+
+
+async def ingest(client: Client, guild: FakeGuild) -> tuple[float, float | None]:
+    start = time.perf_counter()
+    await client.on_message(guild.message(content=f"faka play https://www.youtube.com/playlist?list={PLAYLIST_ID}"))
+    session = client.get_session(guild.id)
+    while session.ingest_tasks:
+        await asyncio.gather(*session.ingest_tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    started_at = session.voice_client.started_at if session.voice_client is not None else None
+    first_audio = started_at - start if started_at is not None else None
+    return elapsed, first_audio
+
+
+async def main(tracks: int, latency: float):
+    SETTINGS.PLAYLIST_MAX_AHEAD = tracks + 1
+    work_directory = tempfile.TemporaryDirectory(prefix="fakabot-benchmark-")
+    data_api = FakeDataApi(playlist_size=tracks, latency=latency)
+    youtube_api = AsyncYoutubeApi(api=build_youtube_api(data_api=data_api, directory=Path(work_directory.name)))
+    discord_api.api.FFmpegPCMAudio = FakeAudioSource
+    discord_api.api.FFmpegOpusAudio = FakeAudioSource
+    client = Client(intents=Intents.default(), youtube_api=youtube_api)
+    client.session_store = SessionStore(path=Path(work_directory.name) / "sessions.journal")
+
+    print(f"{tracks} track playlist, {latency * 1000:.0f} ms simulated Data API latency")
+    for run, guild in enumerate((FakeGuild(guild_id=1), FakeGuild(guild_id=2)), start=1):
+        requests_before = sum(data_api.requests.values())
+        tracemalloc.start()
+        baseline = tracemalloc.take_snapshot()
+        elapsed, first_audio = await ingest(client=client, guild=guild)
+        allocated = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, "filename"))
+        tracemalloc.stop()
+        session = client.get_session(guild.id)
+        queued = len(session.queue) + (session.current_video is not None)
+        label = "cold cache" if run == 1 else "warm cache"
+        first_audio_label = f"{first_audio * 1000:.1f} ms" if first_audio is not None else "n/a"
+        print(
+            f"{label}: {queued} tracks in {elapsed:.3f}s ({queued / elapsed:,.0f} tracks/s), "
+            f"first audio after {first_audio_label}, "
+            f"{sum(data_api.requests.values()) - requests_before} Data API requests, "
+            f"{allocated / max(1, queued):,.0f} bytes/queued track"
+        )
+    print(f"data api requests: {dict(data_api.requests)}")
+    print(f"metadata cache: {youtube_api.api.metadata_cache.stats()}")
+    await asyncio.sleep(SETTINGS.MESSAGE_EDIT_INTERVAL)
+    print(f"status calls: {dict(sorted(client.rest_calls.items()))}")
+    for session in client.sessions.values():
+        session.reset()
+    client.reaper.stop()
+    client.session_store.close()
+    work_directory.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time queuing a large playlist through the play command")
+    parser.add_argument("--tracks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(tracks=args.tracks, latency=args.latency))
@@ -0,0 +1,59 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+import benchmarks  # noqa: F401
+
+DEFERRED_MODULES = ("yt_dlp", "pyyoutube", "requests")
+
+
+def import_times(module: str) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=os.environ,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(module: str, runs: int, top: int, max_ms: float | None) -> int:
+    samples = defaultdict(list)
+    for _ in range(runs):
+        for name, microseconds in import_times(module).items():
+            samples[name].append(microseconds)
+    total = statistics.median(samples[module]) / 1000
+    print(f"import {module}: median {total:.1f} ms over {runs} runs")
+    slowest = sorted(samples.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, values in slowest[1:top + 1]:
+        print(f"{statistics.median(values) / 1000:9.1f} ms  {name}")
+    failed = False
+    eager = [name for name in DEFERRED_MODULES if name in samples]
+    if eager:
+        print(f"imported at startup but should be deferred: {eager}")
+        failed = True
+    if max_ms is not None and total > max_ms:
+        print(f"startup import time {total:.1f} ms is over the {max_ms:.1f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure startup import time with python -X importtime")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+    sys.exit(main(module=args.module, runs=args.runs, top=args.top, max_ms=args.max_ms))
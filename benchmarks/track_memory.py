@@ -0,0 +1,57 @@
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Optional
+
+from pydantic import BaseModel
+
+import benchmarks  # noqa: F401
+from discord_api.src import TrackQueue
+from youtube_api.models import Video
+
+
+class PydanticVideo(BaseModel):
+    # The previous Video model, kept here as the baseline
+    id: Optional[str] = None
+    duration: Optional[int] = None
+    thumbnail_url: Optional[str] = None
+    title: Optional[str] = None
+
+
+def api_items(size: int) -> list[dict]:
+    return [
+        {
+            "id": f"v{index:010d}",
+            "title": f"Artist {index % 97} - Some fairly typical song title number {index}",
+            "duration": 120 + index % 300,
+            "thumbnail_url": f"https://i.ytimg.com/vi/v{index:010d}/default.jpg",
+        }
+        for index in range(size)
+    ]
+
+
+def measure(name: str, video_type: type, items: list[dict]):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    queue = TrackQueue(video_type(**item) for item in items)
+    elapsed = time.perf_counter() - start
+    allocated, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<10} {allocated / len(queue):>8,.0f} bytes/queued track "
+        f"{elapsed / len(queue) * 1e6:>8.2f} us/track to build and queue"
+    )
+    return allocated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure memory per queued track with tracemalloc")
+    parser.add_argument("--size", type=int, default=5_000)
+    args = parser.parse_args()
+    items = api_items(size=args.size)
+    print(f"{args.size} queued tracks")
+    before = measure("pydantic", PydanticVideo, items)
+    after = measure("slotted", Video, items)
+    print(f"slotted tracks use {before / after:.1f}x less memory")
@@ -0,0 +1,54 @@
+import argparse
+import random
+import time
+
+import benchmarks  # noqa: F401
+from discord_api.src import TrackQueue
+from youtube_api.models import Video
+
+PAGE_SIZE = 10
+
+
+def build_videos(size: int) -> list[Video]:
+    return [Video(id=f"vid{index % (size // 2 or 1):08d}", title=f"Track {index}", duration=180) for index in range(size)]
+
+
+def measure(name: str, run, operations: int):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<18} {elapsed * 1000:>10.2f} ms total {elapsed / operations * 1e6:>10.2f} us/op")
+
+
+def bench_list(videos: list[Video], operations: int):
+    print("list")
+    queue = list(videos)
+    measure("display page", lambda: [([None] + queue)[:PAGE_SIZE] for _ in range(operations)], operations)
+    measure("insert middle", lambda: [queue.insert(len(queue) // 2, videos[0]) for _ in range(operations)], operations)
+    measure("remove middle", lambda: [queue.pop(len(queue) // 2) for _ in range(operations)], operations)
+    measure("dedupe", lambda: list({video.id: video for video in queue}.values()), 1)
+    measure("dequeue all", lambda: [queue.pop(0) for _ in range(len(queue))], len(videos))
+
+
+def bench_track_queue(videos: list[Video], operations: int):
+    print("TrackQueue")
+    queue = TrackQueue(videos)
+    measure("display page", lambda: [queue.page(0, PAGE_SIZE) for _ in range(operations)], operations)
+    measure("insert middle", lambda: [queue.insert(len(queue) // 2, videos[0]) for _ in range(operations)], operations)
+    measure("remove middle", lambda: [queue.remove(len(queue) // 2) for _ in range(operations)], operations)
+    measure("move end to front", lambda: [queue.move(len(queue) - 1, 0) for _ in range(operations)], operations)
+    measure("shuffle", lambda: queue.shuffle(random.Random(0)), 1)
+    measure("dedupe", queue.dedupe, 1)
+    queue.extend(videos)
+    measure("dequeue all", lambda: [queue.popleft() for _ in range(len(queue))], len(videos))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the list queue with TrackQueue on large queues")
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--operations", type=int, default=1_000)
+    args = parser.parse_args()
+    videos = build_videos(size=args.size)
+    print(f"{args.size} queued tracks, {args.operations} operations")
+    bench_list(videos=videos, operations=args.operations)
+    bench_track_queue(videos=videos, operations=args.operations)
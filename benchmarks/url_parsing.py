@@ -0,0 +1,113 @@
+import argparse
+import re
+import timeit
+
+import benchmarks  # noqa: F401
+from discord_api.models import ParsedQuery, QueryKind
+
+VIDEO_ID = "dQw4w9WgXcQ"
+PLAYLIST_ID = "PLFgquLnL59alCl_2TQvOiD5Vgm1hCaGSI"
+
+CORPUS = [
+    (f"https://www.youtube.com/watch?v={VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"http://youtube.com/watch?v={VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"youtube.com/watch?v={VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://www.youtube.com/watch?feature=share&v={VIDEO_ID}&t=42s", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://m.youtube.com/watch?v={VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://music.youtube.com/watch?v={VIDEO_ID}&feature=share", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://youtu.be/{VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://youtu.be/{VIDEO_ID}?si=AbCdEfGh&t=10", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://www.youtube.com/shorts/{VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://youtube.com/shorts/{VIDEO_ID}?feature=share", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://www.youtube.com/embed/{VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://www.youtube-nocookie.com/embed/{VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://www.youtube.com/v/{VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://www.youtube.com/live/{VIDEO_ID}", QueryKind.VIDEO, VIDEO_ID, None),
+    (f"https://www.youtube.com/playlist?list={PLAYLIST_ID}", QueryKind.PLAYLIST, None, PLAYLIST_ID),
+    (f"https://music.youtube.com/playlist?list={PLAYLIST_ID}", QueryKind.PLAYLIST, None, PLAYLIST_ID),
+    (
+        f"https://www.youtube.com/watch?v={VIDEO_ID}&list={PLAYLIST_ID}&index=3",
+        QueryKind.VIDEO_IN_PLAYLIST,
+        VIDEO_ID,
+        PLAYLIST_ID,
+    ),
+    (f"https://youtu.be/{VIDEO_ID}?list={PLAYLIST_ID}", QueryKind.VIDEO_IN_PLAYLIST, VIDEO_ID, PLAYLIST_ID),
+    ("https://www.youtube.com/@SomeChannel", QueryKind.SEARCH, None, None),
+    ("https://www.youtube.com/watch?v=short", QueryKind.SEARCH, None, None),
+    ("https://example.com/watch?v=dQw4w9WgXcQ", QueryKind.SEARCH, None, None),
+    ("never gonna give you up", QueryKind.SEARCH, None, None),
+    ("soda stereo", QueryKind.SEARCH, None, None),
+    ("", QueryKind.EMPTY, None, None),
+]
+
+LEGACY_VIDEO_REGEX = (
+    r"^(https?://)?(www\.)?(youtube\.com|youtu\.be|youtube-nocookie\.com)/(watch\?v=|embed/|v/|.+)?[A-Za-z0-9_-]{11}"
+)
+LEGACY_PLAYLIST_REGEX = (
+    r"(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/(watch\?v=[\w-]+&list=[\w-]+|playlist\?list=[\w-]+)"
+)
+LEGACY_ID_PATTERNS = [
+    r"(?:https?://)?(?:www\.)?youtube\.com/watch\?v=([A-Za-z0-9_-]{11})",
+    r"(?:https?://)?(?:www\.)?youtu\.be/([A-Za-z0-9_-]{11})",
+    r"(?:https?://)?(?:www\.)?youtube\.com/embed/([A-Za-z0-9_-]{11})",
+    r"(?:https?://)?(?:www\.)?youtube\.com/v/([A-Za-z0-9_-]{11})",
+]
+
+
+def legacy_classify(query: str):
+    if re.match(LEGACY_PLAYLIST_REGEX, query):
+        return QueryKind.PLAYLIST
+    if re.match(LEGACY_VIDEO_REGEX, query):
+        for pattern in LEGACY_ID_PATTERNS:
+            match = re.match(pattern, query)
+            if match:
+                return QueryKind.VIDEO, match.group(1)
+        return QueryKind.VIDEO, None
+    return QueryKind.SEARCH if query else QueryKind.EMPTY
+
+
+def check_corpus() -> int:
+    failures = 0
+    for query, kind, video_id, playlist_id in CORPUS:
+        parsed = ParsedQuery.from_query(query)
+        if (parsed.kind, parsed.video_id, parsed.playlist_id) != (kind, video_id, playlist_id):
+            failures += 1
+            print(f"FAIL {query!r}: got {parsed.kind}/{parsed.video_id}/{parsed.playlist_id}")
+    print(f"{len(CORPUS) - failures}/{len(CORPUS)} corpus entries classified correctly")
+    return failures
+
+
+def count_avoided_searches() -> int:
+    avoided = 0
+    for query, kind, *_ in CORPUS:
+        legacy = legacy_classify(query)
+        legacy_searches = legacy == QueryKind.SEARCH or legacy == (QueryKind.VIDEO, None)
+        if legacy_searches and kind not in (QueryKind.SEARCH, QueryKind.EMPTY):
+            avoided += 1
+    print(f"{avoided} corpus URLs that used to fall through to a 100-unit search.list call or fail now resolve directly")
+    return avoided
+
+
+def main(repeat: int, number: int):
+    failures = check_corpus()
+    count_avoided_searches()
+    queries = [query for query, *_ in CORPUS]
+    classifiers = {"legacy": legacy_classify, "parsed": ParsedQuery.from_query}
+    timings = {name: [] for name in classifiers}
+    # Interleave the runs so both classifiers see the same machine noise
+    for _ in range(repeat):
+        for name, classify in classifiers.items():
+            timings[name].append(timeit.timeit(lambda: [classify(query) for query in queries], number=number))
+    best = {name: min(values) / (number * len(queries)) for name, values in timings.items()}
+    for name, seconds in best.items():
+        print(f"{name:<8} {seconds * 1e9:>10,.0f} ns/query")
+    print(f"parsed takes {best['parsed'] / best['legacy']:.2f}x the time of legacy")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and time YouTube query classification")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    main(repeat=args.repeat, number=args.number)
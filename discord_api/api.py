@@ -1,69 +1,225 @@
 import asyncio
-import functools
+import math
 import random
+import time
+from collections import Counter
 from datetime import datetime
 
 import discord
-from discord import Message, Client as DiscordClient, Embed, FFmpegPCMAudio
+from discord import AudioSource, Message, Client as DiscordClient, Embed, FFmpegOpusAudio, FFmpegPCMAudio
 
-from discord_api.models import Action, Command, COMMANDS, COMMANDS_HELP
-from discord_api.src import PlaySelector
+from discord_api.models import Action, Command, COMMANDS, COMMANDS_HELP, QueryKind, SessionState
+from discord_api.src import (
+    CommandParser,
+    GuildSession,
+    InactivityReaper,
+    LiveMessage,
+    OggOpusAudio,
+    PlaybackScheduler,
+    PlaySelector,
+    Prefetcher,
+    SessionStore,
+)
 from logger import logger
-from youtube_api.api import YOUTUBE_API
+from metrics import METRICS
+from settings import SETTINGS
+from youtube_api.async_api import AsyncYoutubeApi, get_async_youtube_api
 from youtube_api.models import Video
 
+STREAM_BEFORE_OPTIONS = "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5"
+QUEUE_PAGE_SIZE = 10
+SEEK_STEP_SECONDS = 10
+COMMAND_SECONDS = METRICS.histogram('fakabot_command_seconds', 'Time spent handling a chat command', ('action',))
+
 
 class Client(DiscordClient):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, youtube_api: AsyncYoutubeApi | None = None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.youtube_api = youtube_api if youtube_api is not None else get_async_youtube_api()
         self.start_keywords = ["faka ", "f "]
-        self.queue = []
-        self.current_video = None
-        self.voice_client = None
+        self.command_parser = CommandParser(start_keywords=self.start_keywords, commands=COMMANDS)
+        self.sessions: dict[int, GuildSession] = {}
+        self.background_tasks: set[asyncio.Task] = set()
+        self.scheduler = PlaybackScheduler(play_next=self.play_next_in_queue)
+        self.reaper = InactivityReaper(timeout=SETTINGS.INACTIVITY_TIMEOUT, on_idle=self.reap_session)
+        self.prefetcher = Prefetcher(youtube_api=self.youtube_api, depth=SETTINGS.PREFETCH_DEPTH)
+        self.session_store = SessionStore(
+            path=SETTINGS.shard_path(SETTINGS.SESSION_JOURNAL_PATH), compact_after=SETTINGS.SESSION_JOURNAL_COMPACT_AFTER
+        )
+        self.checkpoint_task: asyncio.Task | None = None
+        self.rest_calls: Counter[tuple[str, str]] = Counter()
         self.handlers = {
             Action.PLAY: self.handle_play,
             Action.PAUSE: self.handle_pause,
             Action.RESUME: self.handle_resume,
             Action.STOP: self.handle_stop,
             Action.SKIP: self.handle_skip,
+            Action.SEEK: self.handle_seek,
+            Action.FORWARD: self.handle_forward,
+            Action.REWIND: self.handle_rewind,
             Action.QUEUE: self.handle_queue,
+            Action.SHUFFLE: self.handle_shuffle,
+            Action.REMOVE: self.handle_remove,
+            Action.MOVE: self.handle_move,
+            Action.DEDUPE: self.handle_dedupe,
             Action.CLEAR: self.handle_clear,
             Action.DISCONNECT: self.handle_disconnect,
             Action.HELP: self.handle_help,
         }
-        self.last_playing = None
+        self.register_metrics()
+
+    def register_metrics(self):
+        # These callbacks run on the metrics server thread while the event loop adds and removes sessions, so they
+        # iterate over a snapshot of the sessions and only read scalar fields
+        METRICS.callback(
+            'fakabot_queue_length',
+            'Tracks waiting in each guild queue',
+            lambda: {(session.guild_id,): len(session.queue) for session in list(self.sessions.values())},
+            labelnames=('guild',),
+        )
+        METRICS.callback(
+            'fakabot_voice_sessions',
+            'Guild sessions connected to a voice channel',
+            lambda: {(): sum(session.voice_client is not None for session in list(self.sessions.values()))},
+        )
+        METRICS.callback('fakabot_inactivity_timers', 'Pending inactivity timers', lambda: {(): self.reaper.stats()['timers']})
+        METRICS.callback(
+            'fakabot_stale_track_events_total',
+            'Track end events ignored because the session had already advanced',
+            lambda: {(): self.scheduler.stale_events},
+            kind='counter',
+        )
+        METRICS.callback(
+            'fakabot_discord_rest_calls_total',
+            'Status messages sent, edited, or saved by coalescing them into another call',
+            lambda: dict(self.rest_calls),
+            labelnames=('kind', 'result'),
+            kind='counter',
+        )
+
+    def record_rest_call(self, kind: str, result: str):
+        self.rest_calls[kind, result] += 1
+
+    def live_message(self, channel: discord.abc.Messageable, kind: str) -> LiveMessage:
+        return LiveMessage(channel, kind=kind, record=self.record_rest_call, interval=SETTINGS.MESSAGE_EDIT_INTERVAL)
+
+    def show_now_playing(self, session: GuildSession):
+        if session.text_channel is None:
+            return
+        if session.now_playing is None or session.now_playing.channel is not session.text_channel:
+            session.now_playing = self.live_message(session.text_channel, kind='now_playing')
+        video = session.current_video
+        if video is None:
+            session.now_playing.update(Embed(title="No hay más canciones en cola"))
+            return
+        embed = Embed(title="Reproduciendo canción")
+        label = video.label if session.track_offset <= 0 else f"{video.title} ({session.position_label})"
+        embed.add_field(name="", value=label, inline=False)
+        embed.set_thumbnail(url=video.thumbnail_url)
+        if session.queue:
+            embed.set_footer(text=f"Siguiente: {session.queue[0].title} · {len(session.queue)} canciones en cola")
+        session.now_playing.update(embed)
+
+    def get_session(self, guild_id: int) -> GuildSession:
+        session = self.sessions.get(guild_id)
+        if session is None:
+            session = GuildSession(guild_id=guild_id)
+            self.sessions[guild_id] = session
+        return session
+
+    async def connect_voice(self, session: GuildSession, message: Message):
+        if session.voice_client is None and message.author.voice is not None:
+            session.voice_client = await message.author.voice.channel.connect()
+            session.text_channel = message.channel
+            self.session_store.attach(
+                session.guild_id, voice_channel_id=session.voice_client.channel.id, text_channel_id=message.channel.id
+            )
+            if session.queue:
+                self.session_store.replace_queue(session.guild_id, session.queue)
+            self.reaper.touch(session)
+
+    async def disconnect_session(self, session: GuildSession):
+        if session.voice_client is None:
+            return
+        await session.voice_client.disconnect()
+        session.reset()
+        self.reaper.forget(session)
+        self.prefetcher.cancel(session=session)
+        self.session_store.detach(session.guild_id)
 
     async def on_ready(self):
         logger.info(f"Logged on as {self.user}!")
+        if self.checkpoint_task is None:
+            await self.restore_sessions()
+            self.checkpoint_task = asyncio.create_task(self.checkpoint_sessions())
+
+    async def close(self):
+        self.reaper.stop()
+        if self.checkpoint_task is not None:
+            self.checkpoint_task.cancel()
+            self.session_store.compact(self.session_states())
+        self.session_store.close()
+        self.youtube_api.close()
+        await super().close()
+
+    def session_states(self) -> list[SessionState]:
+        states = (session.to_state() for session in self.sessions.values())
+        return [state for state in states if state is not None]
+
+    async def restore_sessions(self):
+        states = self.session_store.load()
+        results = await asyncio.gather(*(self.restore_session(state=state) for state in states), return_exceptions=True)
+        for state, result in zip(states, results):
+            if isinstance(result, Exception):
+                logger.error(f"Could not restore session of guild {state.guild_id}: {result!r}")
+        self.session_store.compact(self.session_states())
+
+    async def restore_session(self, state: SessionState):
+        channel = self.get_channel(state.voice_channel_id)
+        if channel is None:
+            logger.warning(f"Voice channel {state.voice_channel_id} of guild {state.guild_id} is gone, dropping session")
+            return
+        session = self.get_session(state.guild_id)
+        try:
+            session.voice_client = await channel.connect()
+        except (discord.ClientException, asyncio.TimeoutError) as e:
+            logger.error(f"Could not rejoin voice channel {state.voice_channel_id}: {e!r}")
+            return
+        self.reaper.touch(session)
+        if state.text_channel_id is not None:
+            session.text_channel = self.get_channel(state.text_channel_id)
+        session.queue.extend(state.queue)
+        if state.current_video is not None:
+            session.queue.insert(0, state.current_video)
+        self.session_store.replace_queue(session.guild_id, session.queue)
+        logger.info(f"Restored guild {state.guild_id} with {len(session.queue)} tracks at {state.offset:.0f}s")
+        await self.scheduler.advance(session=session, offset=state.offset)
+
+    async def checkpoint_sessions(self):
+        while True:
+            await asyncio.sleep(SETTINGS.SESSION_CHECKPOINT_INTERVAL)
+            for session in self.sessions.values():
+                if session.current_video is not None and session.track_started is not None:
+                    self.session_store.position(session.guild_id, session.position)
+            if self.session_store.needs_compaction:
+                self.session_store.compact(self.session_states())
 
     async def on_message(self, message: Message):
         command = await self.get_command(message=message)
         await self.handle_command(message=message, command=command)
 
     async def get_command(self, message: Message) -> Command | None:
-        if message.author == self.user:
+        if message.author == self.user or message.guild is None:
             return None
 
         content = message.content.strip()
-        start_keyword = None
-        for keyword in self.start_keywords:
-            if content.casefold().startswith(keyword):
-                start_keyword = keyword
-                break
-        if start_keyword is None:
+        if not self.command_parser.is_triggered(content):
             return None
 
         if message.author.voice is None:
             await message.channel.send("Unite a un canal de voz primero")
             return None
-        for command, options in COMMANDS.items():
-            for option in options:
-                if content.casefold().startswith(f"{start_keyword}{option}"):
-                    return Command(
-                        action=command,
-                        query=content[len(start_keyword) + len(option) :].strip(),
-                    )
-        return None
+        return self.command_parser.parse(content)
 
     async def handle_command(self, message: Message, command: Command | None):
         if command is None:
@@ -72,23 +228,36 @@ class Client(DiscordClient):
         handler = self.handlers.get(command.action)
         if handler is None:
             return
-        await handler(message=message, command=command)
+        with COMMAND_SECONDS.time(command.action.value):
+            await handler(message=message, command=command)
+        session = self.sessions.get(message.guild.id)
+        if session is not None and session.voice_client is not None:
+            self.reaper.touch(session)
 
     async def handle_play(self, message: Message, command: Command):
-        if command.is_youtube_playlist():
+        query = command.parsed_query
+        if command.is_youtube_playlist() and not (query.is_mix and query.video_id):
             logger.info(f"Command is a playlist: {command.query}")
-            videos = YOUTUBE_API.get_playlist_videos_from_url(url=command.query)
-            for video in videos:
-                await self.add_to_queue(video=video, message=message)
+            session = self.get_session(message.guild.id)
+            task = asyncio.create_task(
+                self.ingest_playlist(
+                    session=session,
+                    playlist_id=query.playlist_id,
+                    start=query.playlist_start,
+                    message=message,
+                )
+            )
+            session.ingest_tasks.add(task)
+            task.add_done_callback(session.ingest_tasks.discard)
             return
         elif command.is_youtube_video():
             logger.info(f"Command is a video: {command.query}")
-            video = YOUTUBE_API.get_video_from_id(video_id=command.get_youtube_video_id())
+            video = await self.youtube_api.get_video_from_id(video_id=query.video_id)
             await self.add_to_queue(video=video, message=message)
             return
-        elif command.query != "":
+        elif query.kind == QueryKind.SEARCH:
             logger.info(f"Command is a search: {command.query}")
-            videos: list[Video] = YOUTUBE_API.search(query=command.query)
+            videos: list[Video] = await self.youtube_api.search(query=command.query)
             embed = Embed(title="Encontré estas canciones:")
             embed.set_thumbnail(url=videos[0].thumbnail_url)
             for index, video in enumerate(videos, start=1):
@@ -102,71 +271,195 @@ class Client(DiscordClient):
         await self.handle_resume(message=message, command=command)
 
     async def handle_pause(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
+        if session.current_video is None:
+            return
         embed = Embed(title="Pausando canción")
-        embed.add_field(name="", value=self.current_video.label, inline=False)
+        embed.add_field(name="", value=session.current_video.label, inline=False)
         await message.channel.send(embed=embed)
-        if self.voice_client is None and message.author.voice is not None:
-            self.voice_client = await message.author.voice.channel.connect()
-        self.voice_client.pause()
+        await self.connect_voice(session=session, message=message)
+        session.voice_client.pause()
+        session.mark_paused()
 
     async def handle_resume(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
         embed = Embed(title="Resumiendo canción")
 
-        if self.current_video:
-            embed.add_field(name="", value=self.current_video.label, inline=False)
+        if session.current_video:
+            embed.add_field(name="", value=f"{session.current_video.title} ({session.position_label})", inline=False)
             await message.channel.send(embed=embed)
-            if self.voice_client is None and message.author.voice is not None:
-                self.voice_client = await message.author.voice.channel.connect()
-            self.voice_client.resume()
+            await self.connect_voice(session=session, message=message)
+            if session.voice_client.is_paused():
+                session.voice_client.resume()
+                session.mark_resumed()
+            elif not session.is_playing() and session.loading_task is None:
+                await self.seek(session=session, position=session.position)
 
-        if (self.voice_client is None or not self.voice_client.is_playing()) and self.queue:
-            if self.voice_client is None and message.author.voice is not None:
-                self.voice_client = await message.author.voice.channel.connect()
-            await self.play_next_in_queue(message=message)
+        if not session.is_playing() and session.queue:
+            await self.connect_voice(session=session, message=message)
+            await self.scheduler.advance(session=session)
 
     async def handle_stop(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
+        if session.current_video is None:
+            return
         embed = Embed(title="Parando canción")
-        embed.add_field(name="", value=self.current_video.label, inline=False)
+        embed.add_field(name="", value=f"{session.current_video.title} ({session.position_label})", inline=False)
         await message.channel.send(embed=embed)
-        if self.voice_client is None and message.author.voice is not None:
-            self.voice_client = await message.author.voice.channel.connect()
-        self.voice_client.stop()
-        self.current_video = None
+        await self.connect_voice(session=session, message=message)
+        async with session.transition_lock:
+            session.generation += 1
+            session.cancel_loading()
+            session.mark_paused()
+            session.voice_client.stop()
+            self.session_store.position(session.guild_id, session.position)
 
     async def handle_skip(self, message: Message, command: Command):
-        embed = Embed(title="Saltando canción")
-        embed.add_field(name="", value=self.current_video.label, inline=False)
+        session = self.get_session(message.guild.id)
+        generation, requested = session.generation, time.monotonic()
+        if session.current_video is not None:
+            # The now playing message shows the next track, so the skip needs no reply of its own
+            self.record_rest_call('skip', 'saved')
+        await self.connect_voice(session=session, message=message)
+        if session.generation != generation:
+            return
+        session.cancel_loading()
+        session.voice_client.stop()
+        await self.scheduler.advance(session=session, generation=generation, ended=requested)
+
+    async def handle_seek(self, message: Message, command: Command):
+        seconds = command.get_seconds()
+        if seconds is None:
+            await message.channel.send("Indicá a qué momento ir, por ejemplo: faka ir a 1:30")
+            return
+        await self.seek_and_report(message=message, position=seconds)
+
+    async def handle_forward(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
+        seconds = command.get_seconds()
+        await self.seek_and_report(message=message, position=session.position + (seconds or SEEK_STEP_SECONDS))
+
+    async def handle_rewind(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
+        seconds = command.get_seconds()
+        await self.seek_and_report(message=message, position=session.position - (seconds or SEEK_STEP_SECONDS))
+
+    async def seek_and_report(self, message: Message, position: float):
+        session = self.get_session(message.guild.id)
+        if session.current_video is None or session.voice_client is None:
+            await message.channel.send("No hay ninguna canción sonando")
+            return
+        if await self.seek(session=session, position=position) is None:
+            return
+        embed = Embed(title=f"Yendo a {session.position_label}")
+        embed.add_field(name="", value=session.current_video.label, inline=False)
         await message.channel.send(embed=embed)
-        if self.voice_client is None and message.author.voice is not None:
-            self.voice_client = await message.author.voice.channel.connect()
-        self.voice_client.stop()
-        await self.play_next_in_queue(message=message)
+
+    async def seek(self, session: GuildSession, position: float) -> float | None:
+        async with session.transition_lock:
+            video = session.current_video
+            if video is None or session.voice_client is None:
+                return None
+            if video.duration:
+                position = min(position, video.duration - 1)
+            position = max(0.0, position)
+            paused = session.voice_client.is_paused()
+            session.generation += 1
+            session.cancel_loading()
+            session.voice_client.stop()
+            if not await self.start_track(session=session, offset=position):
+                if session.current_video is None:
+                    await self.play_next_in_queue(session=session)
+                    if session.current_video is None:
+                        self.show_now_playing(session)
+                return None
+            if paused:
+                session.voice_client.pause()
+                session.mark_paused()
+            self.session_store.position(session.guild_id, position)
+            return position
 
     async def handle_queue(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
         embed = Embed(title="Cola de canciones")
-        queue = [self.current_video] + self.queue
-        if not queue:
+        if session.current_video is None and not session.queue:
             embed.add_field(name="", value="No hay canciones en cola", inline=False)
-        for index, video in enumerate(queue, start=1):
+        if session.current_video is not None:
+            embed.add_field(name="", value=f"▶ {session.current_video.title} ({session.position_label})", inline=False)
+        pages = max(1, math.ceil(len(session.queue) / QUEUE_PAGE_SIZE))
+        page = min(max(1, next(iter(command.get_numbers()), 1)), pages)
+        start = (page - 1) * QUEUE_PAGE_SIZE
+        for index, video in enumerate(session.queue.page(start, QUEUE_PAGE_SIZE), start=start + 1):
             embed.add_field(name="", value=f"{index}) {video.label}", inline=False)
-            if index == 10:
-                embed.add_field(name="", value="...", inline=False)
-                break
+        if pages > 1:
+            embed.set_footer(text=f"Página {page}/{pages} · {len(session.queue)} canciones en cola")
+        await message.channel.send(embed=embed)
+
+    async def handle_shuffle(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
+        session.queue.shuffle()
+        self.session_store.replace_queue(session.guild_id, session.queue)
+        self.prefetcher.update(session=session)
+        await message.channel.send(f"Cola mezclada ({len(session.queue)} canciones)")
+
+    async def handle_remove(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
+        positions = sorted({number for number in command.get_numbers() if 1 <= number <= len(session.queue)}, reverse=True)
+        if not positions:
+            await message.channel.send("Indicá la posición de la canción en la cola, por ejemplo: faka sacar 3")
+            return
+        removed = [session.queue.remove(position - 1) for position in positions]
+        self.session_store.replace_queue(session.guild_id, session.queue)
+        session.queue_changed.set()
+        self.prefetcher.update(session=session)
+        embed = Embed(title="Quitando de la cola")
+        for video in reversed(removed):
+            embed.add_field(name="", value=video.label, inline=False)
         await message.channel.send(embed=embed)
 
+    async def handle_move(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
+        numbers = command.get_numbers()
+        if len(numbers) < 2 or not all(1 <= number <= len(session.queue) for number in numbers[:2]):
+            await message.channel.send("Indicá la posición de origen y de destino, por ejemplo: faka mover 7 1")
+            return
+        source, target = numbers[:2]
+        video = session.queue.move(source - 1, target - 1)
+        self.session_store.replace_queue(session.guild_id, session.queue)
+        self.prefetcher.update(session=session)
+        embed = Embed(title=f"Moviendo canción a la posición {target}")
+        embed.add_field(name="", value=video.label, inline=False)
+        await message.channel.send(embed=embed)
+
+    async def handle_dedupe(self, message: Message, command: Command):
+        session = self.get_session(message.guild.id)
+        removed = session.queue.dedupe()
+        if removed:
+            self.session_store.replace_queue(session.guild_id, session.queue)
+        session.queue_changed.set()
+        self.prefetcher.update(session=session)
+        await message.channel.send(f"Quité {removed} canciones repetidas de la cola")
+
     async def handle_clear(self, message: Message, command: Command):
-        self.queue = []
-        self.current_video = None
-        if self.voice_client is not None:
-            self.voice_client.stop()
+        session = self.get_session(message.guild.id)
+        session.queue.clear()
+        session.current_video = None
+        session.cancel_loading()
+        session.cancel_ingestion()
+        session.queue_changed.set()
+        self.session_store.replace_queue(session.guild_id, ())
+        self.session_store.play(session.guild_id, None)
+        self.prefetcher.cancel(session=session)
+        if session.voice_client is not None:
+            session.voice_client.stop()
         await message.channel.send("Cola de canciones limpiada")
 
     async def handle_disconnect(self, message: Message, command: Command = None):
-        if self.voice_client is not None:
-            await self.voice_client.disconnect()
-            self.voice_client = None
-            self.current_video = None
-            self.last_playing = None
+        session = self.get_session(message.guild.id)
+        await self.disconnect_session(session=session)
+        await self.say_goodbye(channel=message.channel)
+
+    async def say_goodbye(self, channel: discord.abc.Messageable):
         goodbye_messages = [
             "Chau!",
             "Nos vemos!",
@@ -177,7 +470,7 @@ class Client(DiscordClient):
             "gg ez",
             "nv",
         ]
-        await message.channel.send(random.choice(goodbye_messages))
+        await channel.send(random.choice(goodbye_messages))
 
     async def handle_help(self, message: Message, command: Command):
         embed = Embed(title="Comandos disponibles")
@@ -186,39 +479,146 @@ class Client(DiscordClient):
         await message.channel.send(embed=embed)
 
     async def add_to_queue(self, video: Video, message: Message):
-        if self.voice_client is None:
-            if message.author is None or message.author.voice is None:
-                return
-            self.voice_client = await message.author.voice.channel.connect()
-        self.queue.append(video)
-        if len(self.queue) == 1:
-            await self.play_next_in_queue(message=message)
+        await self.add_videos_to_queue(videos=[video], message=message)
 
-    def _audio_finish_callback(self, message: Message):
-        asyncio.run(self.play_next_in_queue(message=message))
+    async def add_videos_to_queue(self, videos: list[Video], message: Message) -> int:
+        session = self.get_session(message.guild.id)
+        if message.author is None:
+            return 0
+        await self.connect_voice(session=session, message=message)
+        if session.voice_client is None:
+            return 0
+        session.queue.extend(videos)
+        self.session_store.extend(session.guild_id, videos)
+        self.prefetcher.update(session=session)
+        if session.current_video is None and not session.is_playing():
+            await self.scheduler.advance(session=session)
+        return len(videos)
 
-    async def play_next_in_queue(self, message: Message):
-        if self.voice_client is None:
-            return
-        if self.voice_client.is_playing():
+    async def ingest_playlist(self, session: GuildSession, playlist_id: str, start: int, message: Message):
+        queued = 0
+        interrupted = False
+        summary = self.live_message(message.channel, kind='playlist')
+        try:
+            async for videos in self.youtube_api.iter_playlist_videos(playlist_id=playlist_id, start=start):
+                while len(session.queue) >= SETTINGS.PLAYLIST_MAX_AHEAD and self.is_connected(session):
+                    session.queue_changed.clear()
+                    await session.queue_changed.wait()
+                # The first page connects the session; after that, stop fetching pages once it is gone
+                if queued and not self.is_connected(session):
+                    interrupted = True
+                    break
+                added = await self.add_videos_to_queue(videos=videos, message=message)
+                if videos and not added:
+                    interrupted = True
+                    break
+                queued += added
+                summary.update(Embed(title=f"Agregando playlist: {queued} canciones en cola"))
+        except Exception as e:
+            logger.error(f"Error queuing playlist {playlist_id}: {e!r}")
+        logger.info(f"Queued {queued} videos from playlist {playlist_id}")
+        if interrupted:
+            summary.update(Embed(title=f"Playlist interrumpida: {queued} canciones agregadas"))
+        else:
+            summary.update(Embed(title=f"Playlist agregada: {queued} canciones"))
+
+    def is_connected(self, session: GuildSession) -> bool:
+        return session.voice_client is not None and self.sessions.get(session.guild_id) is session
+
+    async def create_audio_source(self, video: Video, offset: float = 0.0) -> AudioSource:
+        seek_options = f"-ss {offset:.1f}" if offset > 0 else ""
+        if SETTINGS.PLAYBACK_MODE == "download" or self.youtube_api.is_cached(video):
+            path = await self.youtube_api.get_video_file(video=video)
+            if path.suffix == ".opus":
+                return OggOpusAudio(path, offset=offset)
+            return FFmpegPCMAudio(path, before_options=seek_options or None)
+        stream = await self.youtube_api.get_audio_stream(video=video)
+        if SETTINGS.CACHE_WRITE_THROUGH:
+            self.run_in_background(self.youtube_api.get_video_file(video=video))
+        before_options = f"{STREAM_BEFORE_OPTIONS} {seek_options}".strip()
+        if stream.is_opus:
+            return FFmpegOpusAudio(stream.url, codec="copy", before_options=before_options)
+        return FFmpegPCMAudio(stream.url, before_options=before_options, options="-vn")
+
+    def run_in_background(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self.background_tasks.add(task)
+        task.add_done_callback(self._background_task_done)
+
+    def _background_task_done(self, task: asyncio.Task):
+        self.background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background task failed: {task.exception()!r}")
+
+    async def play_next_in_queue(self, session: GuildSession, offset: float = 0.0):
+        if session.voice_client is None or self.is_closed():
             return
-        if not self.queue:
-            self.current_video = None
+        if session.voice_client.is_playing() or session.loading_task is not None:
             return
-        self.current_video = self.queue.pop(0)
-        audio_source = FFmpegPCMAudio(YOUTUBE_API.get_video_file(video=self.current_video))
-        self.voice_client.play(audio_source, after=functools.partial(self._audio_finish_callback, message=message))
-        embed = Embed(title="Reproduciendo canción")
-        embed.add_field(name="", value=self.current_video.label, inline=False)
-        await message.channel.send(embed=embed)
-        if self.last_playing is None:
-            self.last_playing = datetime.now()
-            asyncio.create_task(self.inactivity_check(message=message))
+        session.generation += 1
+        dropped = False
+        while session.queue:
+            session.current_video = session.queue.popleft()
+            self.session_store.play(session.guild_id, session.current_video)
+            session.queue_changed.set()
+            self.prefetcher.update(session=session)
+            if await self.start_track(session=session, offset=offset):
+                if offset > 0:
+                    self.session_store.position(session.guild_id, offset)
+                self.show_now_playing(session)
+                session.last_playing = datetime.now()
+                self.reaper.touch(session)
+                return
+            if session.current_video is not None:
+                # Cancelled or disconnected while loading, the track was not dropped
+                return
+            dropped, offset = True, 0.0
+        if session.current_video is not None or dropped:
+            self.session_store.play(session.guild_id, None)
+            session.current_video = None
+            self.show_now_playing(session)
 
-    async def inactivity_check(self, message: Message):
-        while True:
-            await asyncio.sleep(300)
-            if self.voice_client is not None and not self.voice_client.is_playing():
-                await self.handle_disconnect(message=message)
+    async def start_track(self, session: GuildSession, offset: float = 0.0) -> bool:
+        video = session.current_video
+        loading_task = asyncio.ensure_future(self.create_audio_source(video=video, offset=offset))
+        session.loading_task = loading_task
+        try:
+            audio_source = await loading_task
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            return False
+        except Exception as e:
+            logger.error(f"Could not load {video.url} in guild {session.guild_id}: {e!r}")
+            await self.drop_track(session=session, video=video)
+            return False
+        finally:
+            if session.loading_task is loading_task:
+                session.loading_task = None
+        if session.voice_client is None:
+            audio_source.cleanup()
+            return False
+        session.voice_client.play(
+            self.scheduler.track_source(session=session, source=audio_source),
+            after=self.scheduler.finished_callback(session=session),
+        )
+        session.mark_started(offset=offset)
+        return True
 
+    async def drop_track(self, session: GuildSession, video: Video):
+        session.current_video = None
+        session.track_offset, session.track_started = 0.0, None
+        self.session_store.play(session.guild_id, None)
+        if session.text_channel is not None:
+            try:
+                next_label = ", pasando a la siguiente" if session.queue else ""
+                await session.text_channel.send(f"No se pudo reproducir {video.title}{next_label}")
+            except discord.HTTPException as e:
+                logger.warning(f"Could not report failed track in guild {session.guild_id}: {e!r}")
 
+    async def reap_session(self, session: GuildSession):
+        logger.info(f"Disconnecting idle guild {session.guild_id}")
+        text_channel = session.text_channel
+        await self.disconnect_session(session=session)
+        if text_channel is not None:
+            await self.say_goodbye(channel=text_channel)
@@ -7,7 +7,14 @@ class Action(StrEnum):
     RESUME = "resume"
     STOP = "stop"
     SKIP = "skip"
+    SEEK = "seek"
+    FORWARD = "forward"
+    REWIND = "rewind"
     QUEUE = "queue"
+    SHUFFLE = "shuffle"
+    REMOVE = "remove"
+    MOVE = "move"
+    DEDUPE = "dedupe"
     CLEAR = "clear"
     DISCONNECT = "disconnect"
     HELP = "help"
@@ -1,36 +1,36 @@
-import re
+from functools import cached_property
 from typing import Optional
 
 from pydantic import BaseModel
 
-from discord_api.models import Action
+from discord_api.models import Action, ParsedQuery, QueryKind
 
 
 class Command(BaseModel):
     action: Action
     query: str
 
+    @cached_property
+    def parsed_query(self) -> ParsedQuery:
+        return ParsedQuery.from_query(self.query)
+
     def is_youtube_video(self) -> bool:
-        youtube_regex = r"^(https?://)?(www\.)?(youtube\.com|youtu\.be|youtube-nocookie\.com)/(watch\?v=|embed/|v/|.+)?[A-Za-z0-9_-]{11}"
-        return bool(re.match(youtube_regex, self.query))
+        return self.parsed_query.kind in (QueryKind.VIDEO, QueryKind.VIDEO_IN_PLAYLIST)
 
     def is_youtube_playlist(self) -> bool:
-        playlist_regex = r"(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/(watch\?v=[\w-]+&list=[\w-]+|playlist\?list=[\w-]+)"
-        return bool(re.match(playlist_regex, self.query))
+        return self.parsed_query.kind in (QueryKind.PLAYLIST, QueryKind.VIDEO_IN_PLAYLIST)
 
     def get_youtube_video_id(self) -> Optional[str]:
-        patterns = [
-            r"(?:https?://)?(?:www\.)?youtube\.com/watch\?v=([A-Za-z0-9_-]{11})",
-            r"(?:https?://)?(?:www\.)?youtu\.be/([A-Za-z0-9_-]{11})",
-            r"(?:https?://)?(?:www\.)?youtube\.com/embed/([A-Za-z0-9_-]{11})",
-            r"(?:https?://)?(?:www\.)?youtube\.com/v/([A-Za-z0-9_-]{11})",
-        ]
+        return self.parsed_query.video_id
 
-        for pattern in patterns:
-            match = re.match(pattern, self.query)
-            if match:
-                return match.group(1)
+    def get_numbers(self) -> list[int]:
+        return [int(word) for word in self.query.split() if word.isdigit()]
 
+    def get_seconds(self) -> Optional[int]:
+        for word in self.query.split():
+            parts = word.removesuffix("s").split(":")
+            if len(parts) <= 3 and all(part.isdigit() for part in parts):
+                return sum(int(part) * 60 ** power for power, part in enumerate(reversed(parts)))
         return None
 
 
@@ -51,7 +51,14 @@ COMMANDS = {
     Action.RESUME: ["resume", "resumir", "resumime", "segui", "dale", "mandale"],
     Action.STOP: ["stop"],
     Action.SKIP: ["skip", "saltear", "salta", "siguiente", "sig", "next"],
+    Action.SEEK: ["seek", "ir a", "anda a"],
+    Action.FORWARD: ["forward", "adelantar", "adelanta"],
+    Action.REWIND: ["rewind", "atrasar", "atrasa", "rebobinar", "rebobina"],
     Action.QUEUE: ["queue", "cola", "list"],
+    Action.SHUFFLE: ["shuffle", "mezclar", "mezcla"],
+    Action.REMOVE: ["remove", "sacar", "saca", "quitar", "quita"],
+    Action.MOVE: ["move", "mover"],
+    Action.DEDUPE: ["dedupe", "sin repetidos"],
     Action.CLEAR: ["clear", "lavate la cola", "limpiate la cola"],
     Action.DISCONNECT: ["disconnect", "desconectar", "salir", "chau", "vete", "raja"],
     Action.HELP: ["help", "ayuda", "comandos", "commands", "halluda"],
@@ -63,7 +70,14 @@ COMMANDS_HELP = {
     Action.RESUME: "Reanuda la canción pausada",
     Action.STOP: "Detiene la canción actual",
     Action.SKIP: "Salta a la siguiente canción",
-    Action.QUEUE: "Muestra la cola de canciones",
+    Action.SEEK: "Va a un momento de la canción actual, por ejemplo: faka ir a 1:30",
+    Action.FORWARD: "Adelanta la canción actual, 10 segundos o los que se indiquen, por ejemplo: faka adelantar 30",
+    Action.REWIND: "Atrasa la canción actual, 10 segundos o los que se indiquen, por ejemplo: faka atrasar 30",
+    Action.QUEUE: "Muestra la cola de canciones. Se puede indicar la página, por ejemplo: faka cola 2",
+    Action.SHUFFLE: "Mezcla la cola de canciones",
+    Action.REMOVE: "Quita canciones de la cola por posición, por ejemplo: faka sacar 3 5",
+    Action.MOVE: "Mueve una canción de la cola a otra posición, por ejemplo: faka mover 7 1",
+    Action.DEDUPE: "Quita las canciones repetidas de la cola",
     Action.CLEAR: "Limpia la cola de canciones",
     Action.DISCONNECT: "Desconecta al bot del canal de voz",
     Action.HELP: "Muestra esta ayuda",
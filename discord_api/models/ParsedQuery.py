@@ -0,0 +1,92 @@
+import re
+from typing import Optional
+
+from discord_api.models import QueryKind
+
+# Only YouTube hosts match, so anything else is rejected as a search before the path or query is looked at
+YOUTUBE_URL_PATTERN = re.compile(
+    r"(?:[a-z][a-z0-9+.-]*://)?(?:[^@/?#\s]*@)?"
+    r"(?:(?P<short>(?:www\.)?youtu\.be)|(?:www\.|m\.|music\.)?youtube\.com|(?:www\.)?youtube-nocookie\.com)"
+    r"(?::\d*)?(?:/+(?P<first>[^/?#\s]*)(?:/+(?P<second>[^/?#\s]*))?(?P<rest>/[^?#\s]*)?)?"
+    r"(?:\?(?P<query>[^#\s]*))?(?:#\S*)?",
+    re.IGNORECASE,
+)
+QUERY_PARAM_PATTERN = re.compile(r"(?:^|&)(v|list|index)=([^&]*)")
+VIDEO_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{11}")
+PLAYLIST_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{2,64}")
+VIDEO_PATH_PREFIXES = frozenset({"embed", "v", "e", "shorts", "live"})
+
+
+class ParsedQuery:
+    # Built for every play command, so a slotted class rather than a validated model
+    __slots__ = ('kind', 'text', 'video_id', 'playlist_id', 'index')
+
+    def __init__(
+        self,
+        kind: QueryKind,
+        text: str = "",
+        video_id: Optional[str] = None,
+        playlist_id: Optional[str] = None,
+        index: Optional[int] = None,
+    ):
+        self.kind = kind
+        self.text = text
+        self.video_id = video_id
+        self.playlist_id = playlist_id
+        self.index = index
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ParsedQuery):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'ParsedQuery({fields})'
+
+    @property
+    def is_mix(self) -> bool:
+        return self.playlist_id is not None and self.playlist_id.startswith("RD")
+
+    @property
+    def playlist_start(self) -> int:
+        return self.index + 1 if self.index is not None else 0
+
+    @classmethod
+    def from_query(cls, query: str) -> "ParsedQuery":
+        text = query.strip()
+        if not text:
+            return cls(QueryKind.EMPTY)
+        match = YOUTUBE_URL_PATTERN.fullmatch(text) if "." in text else None
+        if match is None:
+            return cls(QueryKind.SEARCH, text)
+
+        short, first, second, rest, query_string = match.groups()
+        params = {}
+        if query_string:
+            for name, value in QUERY_PARAM_PATTERN.findall(query_string):
+                params.setdefault(name, value)
+        candidate = None
+        if short is not None:
+            candidate = first
+        elif first == "watch" and not second and not rest:
+            candidate = params.get("v")
+        elif second and first in VIDEO_PATH_PREFIXES:
+            candidate = second
+        video_id = candidate if candidate and VIDEO_ID_PATTERN.fullmatch(candidate) else None
+
+        playlist_id = params.get("list")
+        if playlist_id is not None and not PLAYLIST_ID_PATTERN.fullmatch(playlist_id):
+            playlist_id = None
+        index = params.get("index")
+        index = int(index) if index is not None and index.isdigit() else None
+
+        if video_id and playlist_id:
+            kind = QueryKind.VIDEO_IN_PLAYLIST
+        elif video_id:
+            kind = QueryKind.VIDEO
+        elif playlist_id:
+            kind = QueryKind.PLAYLIST
+        else:
+            return cls(QueryKind.SEARCH, text)
+        return cls(kind, text, video_id, playlist_id, index)
@@ -0,0 +1,9 @@
+from enum import StrEnum
+
+
+class QueryKind(StrEnum):
+    EMPTY = "empty"
+    SEARCH = "search"
+    VIDEO = "video"
+    PLAYLIST = "playlist"
+    VIDEO_IN_PLAYLIST = "video_in_playlist"
@@ -0,0 +1,16 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from youtube_api.models import Video
+
+
+class SessionState(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    guild_id: int
+    voice_channel_id: int
+    text_channel_id: Optional[int] = None
+    current_video: Optional[Video] = None
+    offset: float = 0.0
+    queue: list[Video] = []
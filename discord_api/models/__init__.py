@@ -1,2 +1,5 @@
 from .Action import Action
+from .QueryKind import QueryKind
+from .ParsedQuery import ParsedQuery
 from .Command import Command, COMMANDS, COMMANDS_HELP
+from .SessionState import SessionState
@@ -0,0 +1,30 @@
+import re
+
+from discord_api.models import Action, Command
+
+
+class CommandParser:
+    def __init__(self, start_keywords: list[str], commands: dict[Action, list[str]]):
+        self.actions = {alias.casefold(): action for action, aliases in commands.items() for alias in aliases}
+        keywords = sorted({keyword.strip().casefold() for keyword in start_keywords}, key=len, reverse=True)
+        aliases = sorted(self.actions, key=len, reverse=True)
+        self.first_characters = frozenset(keyword[0] for keyword in keywords) | frozenset(
+            keyword[0].upper() for keyword in keywords
+        )
+        trigger = "|".join(re.escape(keyword) for keyword in keywords)
+        alternation = "|".join(re.escape(alias).replace(r"\ ", r"\s+") for alias in aliases)
+        self.trigger_pattern = re.compile(rf"(?:{trigger})\s", re.IGNORECASE)
+        self.command_pattern = re.compile(
+            rf"(?:{trigger})\s+(?P<alias>{alternation})(?=\s|$)\s*(?P<query>.*)",
+            re.IGNORECASE | re.DOTALL,
+        )
+
+    def is_triggered(self, content: str) -> bool:
+        return content[:1] in self.first_characters and self.trigger_pattern.match(content) is not None
+
+    def parse(self, content: str) -> Command | None:
+        match = self.command_pattern.match(content)
+        if match is None:
+            return None
+        alias = " ".join(match.group("alias").casefold().split())
+        return Command(action=self.actions[alias], query=match.group("query").strip())
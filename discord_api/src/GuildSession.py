@@ -0,0 +1,92 @@
+import asyncio
+import time
+from datetime import datetime
+
+from discord import TextChannel, VoiceClient
+
+from discord_api.models import SessionState
+from discord_api.src.LiveMessage import LiveMessage
+from discord_api.src.TrackQueue import TrackQueue
+from youtube_api.models import Video
+
+
+class GuildSession:
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.queue = TrackQueue()
+        self.current_video: Video | None = None
+        self.voice_client: VoiceClient | None = None
+        self.text_channel: TextChannel | None = None
+        self.now_playing: LiveMessage | None = None
+        self.last_playing: datetime | None = None
+        self.loading_task: asyncio.Future | None = None
+        self.ingest_tasks: set[asyncio.Task] = set()
+        self.queue_changed = asyncio.Event()
+        self.track_offset = 0.0
+        self.track_started: float | None = None
+        self.generation = 0
+        self.transition_lock = asyncio.Lock()
+        self.transition_started: tuple[float, bool] | None = None
+
+    def is_playing(self) -> bool:
+        return self.voice_client is not None and self.voice_client.is_playing()
+
+    @property
+    def position(self) -> float:
+        if self.track_started is None:
+            return self.track_offset
+        return self.track_offset + time.monotonic() - self.track_started
+
+    @property
+    def position_label(self) -> str:
+        position = int(self.position)
+        label = f'{position // 60}:{position % 60:02}'
+        if self.current_video is not None and self.current_video.duration is not None:
+            label = f'{label}/{self.current_video.duration_label}'
+        return label
+
+    def mark_started(self, offset: float = 0.0):
+        self.track_offset = offset
+        self.track_started = time.monotonic()
+
+    def mark_paused(self):
+        self.track_offset = self.position
+        self.track_started = None
+
+    def mark_resumed(self):
+        if self.track_started is None:
+            self.track_started = time.monotonic()
+
+    def to_state(self) -> SessionState | None:
+        if self.voice_client is None:
+            return None
+        return SessionState(
+            guild_id=self.guild_id,
+            voice_channel_id=self.voice_client.channel.id,
+            text_channel_id=self.text_channel.id if self.text_channel is not None else None,
+            current_video=self.current_video,
+            offset=self.position if self.current_video is not None else 0.0,
+            queue=list(self.queue),
+        )
+
+    def cancel_loading(self):
+        if self.loading_task is not None:
+            self.loading_task.cancel()
+            self.loading_task = None
+
+    def cancel_ingestion(self):
+        for task in self.ingest_tasks:
+            task.cancel()
+        self.ingest_tasks.clear()
+
+    def reset(self):
+        self.cancel_loading()
+        self.cancel_ingestion()
+        if self.now_playing is not None:
+            self.now_playing.cancel()
+            self.now_playing = None
+        self.voice_client = None
+        self.current_video = None
+        self.last_playing = None
+        self.track_offset = 0.0
+        self.track_started = None
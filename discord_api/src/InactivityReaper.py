@@ -0,0 +1,90 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable
+
+from discord_api.src.GuildSession import GuildSession
+from logger import logger
+
+
+class InactivityReaper:
+    def __init__(self, timeout: float, on_idle: Callable[[GuildSession], Awaitable[None]]):
+        self.timeout = timeout
+        self.on_idle = on_idle
+        self.deadlines: dict[int, float] = {}
+        self.sessions: dict[int, tuple[int, GuildSession]] = {}
+        self.reaped = 0
+        self.task: asyncio.Task | None = None
+        self._heap: list[tuple[float, int, int]] = []
+        self._tokens = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def touch(self, session: GuildSession):
+        deadline = time.monotonic() + self.timeout
+        self.deadlines[session.guild_id] = deadline
+        if session.guild_id in self.sessions:
+            return
+        token = next(self._tokens)
+        self.sessions[session.guild_id] = (token, session)
+        heapq.heappush(self._heap, (deadline, token, session.guild_id))
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        self._wakeup.set()
+
+    def forget(self, session: GuildSession):
+        self.deadlines.pop(session.guild_id, None)
+        self.sessions.pop(session.guild_id, None)
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> dict:
+        # The heap keeps entries for forgotten sessions until they expire, so live timers are counted from deadlines
+        return {
+            'sessions': len(self.sessions),
+            'timers': len(self.deadlines),
+            'heap_entries': len(self._heap),
+            'reaped': self.reaped,
+        }
+
+    async def run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            idle = self._pop_idle(now=time.monotonic())
+            if not idle:
+                continue
+            self.reaped += len(idle)
+            results = await asyncio.gather(*(self.on_idle(session) for session in idle), return_exceptions=True)
+            for session, result in zip(idle, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Could not disconnect idle guild {session.guild_id}: {result!r}")
+
+    def _pop_idle(self, now: float) -> list[GuildSession]:
+        idle = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, token, guild_id = heapq.heappop(self._heap)
+            entry = self.sessions.get(guild_id)
+            if entry is None or entry[0] != token:
+                continue
+            session = entry[1]
+            if session.is_playing():
+                self.deadlines[guild_id] = now + self.timeout
+            if self.deadlines[guild_id] > deadline:
+                heapq.heappush(self._heap, (self.deadlines[guild_id], token, guild_id))
+                continue
+            self.forget(session)
+            idle.append(session)
+        return idle
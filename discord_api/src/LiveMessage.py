@@ -0,0 +1,67 @@
+import asyncio
+import time
+from typing import Callable
+
+import discord
+from discord import Embed
+
+from logger import logger
+
+
+class LiveMessage:
+    def __init__(
+        self,
+        channel: discord.abc.Messageable,
+        kind: str,
+        record: Callable[[str, str], None],
+        interval: float = 2.0,
+    ):
+        self.channel = channel
+        self.kind = kind
+        self.record = record
+        self.interval = interval
+        self.message: discord.Message | None = None
+        self._embed: Embed | None = None
+        self._task: asyncio.Task | None = None
+        self._last_flush = float('-inf')
+        self._lock = asyncio.Lock()
+
+    def update(self, embed: Embed):
+        pending = self._embed is not None
+        self._embed = embed
+        if pending:
+            # Folded into the flush that is already scheduled
+            self.record(self.kind, 'saved')
+            return
+        delay = max(0.0, self._last_flush + self.interval - time.monotonic())
+        self._task = asyncio.create_task(self._flush_after(delay))
+
+    async def _flush_after(self, delay: float):
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            await self.flush()
+        except discord.HTTPException as e:
+            logger.warning(f'Could not update {self.kind} message: {e!r}')
+
+    async def flush(self):
+        async with self._lock:
+            embed, self._embed = self._embed, None
+            if embed is None:
+                return
+            self._last_flush = time.monotonic()
+            if self.message is not None:
+                try:
+                    await self.message.edit(embed=embed)
+                    self.record(self.kind, 'edit')
+                    return
+                except discord.NotFound:
+                    self.message = None
+            self.message = await self.channel.send(embed=embed)
+            self.record(self.kind, 'send')
+
+    def cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._embed = None
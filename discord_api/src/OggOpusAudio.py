@@ -0,0 +1,162 @@
+import os
+import struct
+from pathlib import Path
+
+from discord import AudioSource
+from discord.oggparse import OggError, OggStream
+
+from logger import logger
+
+HEADER_PACKETS = (b'OpusHead', b'OpusTags')
+SILK_FRAME_SECONDS = (0.01, 0.02, 0.04, 0.06)
+HYBRID_FRAME_SECONDS = (0.01, 0.02)
+CELT_FRAME_SECONDS = (0.0025, 0.005, 0.01, 0.02)
+SAMPLE_RATE = 48000
+# Capture pattern, version, flags, granule position, serial, sequence number, checksum, segment count
+PAGE_HEADER = struct.Struct('<4sBBqIIIB')
+SEEK_WINDOW = 64 * 1024
+
+
+def packet_duration(packet: bytes) -> float:
+    if not packet:
+        return 0.0
+    config, code = packet[0] >> 3, packet[0] & 0b11
+    if config < 12:
+        frame_seconds = SILK_FRAME_SECONDS[config % 4]
+    elif config < 16:
+        frame_seconds = HYBRID_FRAME_SECONDS[config % 2]
+    else:
+        frame_seconds = CELT_FRAME_SECONDS[config % 4]
+    if code == 0:
+        frames = 1
+    elif code < 3:
+        frames = 2
+    else:
+        frames = packet[1] & 0b111111 if len(packet) > 1 else 0
+    return frame_seconds * frames
+
+
+class OggOpusAudio(AudioSource):
+    def __init__(self, path: Path, offset: float = 0.0):
+        self.path = path
+        self._file = path.open('rb')
+        self._packets = OggStream(self._file).iter_packets()
+        if offset > 0:
+            self.seek(offset)
+
+    def seek(self, seconds: float):
+        # Bisect on page granule positions so seeking late into a long track reads a few pages, not the whole file
+        try:
+            seek_point = self._find_seek_point(seconds)
+        except (OSError, OggError, struct.error) as e:
+            logger.warning(f'Could not bisect {self.path}, skipping packets instead: {e!r}')
+            seek_point = None
+        self._file.seek(seek_point[0] if seek_point is not None else 0)
+        self._packets = OggStream(self._file).iter_packets()
+        if seek_point is None:
+            self.skip(seconds)
+            return
+        _start, remaining, continued = seek_point
+        if continued:
+            # The first packet started on the previous page, drop its tail
+            self._next_packet()
+        self.skip(remaining)
+
+    def _find_seek_point(self, seconds: float) -> tuple[int, float, bool] | None:
+        pre_skip = self._pre_skip()
+        target = pre_skip + round(seconds * SAMPLE_RATE)
+        size = os.fstat(self._file.fileno()).st_size
+        low, high = 0, size
+        best = None
+        while high - low > SEEK_WINDOW:
+            middle = (low + high) // 2
+            page = self._find_page(middle, high)
+            if page is None or page[2] > target:
+                high = middle
+            else:
+                best, low = page, page[1]
+        while (page := self._find_page(low, size)) is not None and page[2] <= target:
+            best, low = page, page[1]
+        if best is None:
+            return None
+        _start, end, granule = best
+        next_page = self._read_page(end)
+        continued = next_page is not None and bool(next_page[2] & 0x01)
+        return end, max(0, target - max(granule, pre_skip)) / SAMPLE_RATE, continued
+
+    def _pre_skip(self) -> int:
+        self._file.seek(0)
+        head = next(OggStream(self._file).iter_packets(), b'')
+        if not head.startswith(b'OpusHead') or len(head) < 12:
+            raise OggError(f'{self.path} does not start with an OpusHead packet')
+        return struct.unpack_from('<H', head, 10)[0]
+
+    def _read_page(self, start: int) -> tuple[int, int, int] | None:
+        self._file.seek(start)
+        header = self._file.read(PAGE_HEADER.size)
+        if len(header) < PAGE_HEADER.size:
+            return None
+        capture, version, flag, granule, _serial, _sequence, _checksum, segments = PAGE_HEADER.unpack(header)
+        if capture != b'OggS' or version != 0:
+            return None
+        table = self._file.read(segments)
+        if len(table) < segments:
+            return None
+        end = start + PAGE_HEADER.size + segments + sum(table)
+        self._file.seek(end)
+        if self._file.read(4) not in (b'OggS', b''):
+            return None
+        return end, granule, flag
+
+    def _find_page(self, position: int, limit: int) -> tuple[int, int, int] | None:
+        # First page starting in [position, limit) that ends a packet, as (start, end, granule position)
+        while position < limit:
+            self._file.seek(position)
+            window = self._file.read(SEEK_WINDOW)
+            index = window.find(b'OggS')
+            if index < 0:
+                if len(window) < SEEK_WINDOW:
+                    return None
+                position += len(window) - 3
+                continue
+            start = position + index
+            if start >= limit:
+                return None
+            page = self._read_page(start)
+            if page is None:
+                position = start + 1
+                continue
+            end, granule, _flag = page
+            if granule == -1:
+                position = end
+                continue
+            return start, end, granule
+        return None
+
+    def _next_packet(self) -> bytes:
+        try:
+            for packet in self._packets:
+                if not packet.startswith(HEADER_PACKETS):
+                    return packet
+        except OggError as e:
+            logger.error(f'Could not read Opus packets from {self.path}: {e}')
+        return b''
+
+    def skip(self, seconds: float):
+        skipped = 0.0
+        while skipped < seconds:
+            packet = self._next_packet()
+            if not packet:
+                break
+            skipped += packet_duration(packet)
+
+    def read(self) -> bytes:
+        if self._file.closed:
+            return b''
+        return self._next_packet()
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self):
+        self._file.close()
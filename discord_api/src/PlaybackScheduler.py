@@ -0,0 +1,88 @@
+import asyncio
+import functools
+import statistics
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from discord import AudioSource
+
+from discord_api.src.GuildSession import GuildSession
+from discord_api.src.TimedAudioSource import TimedAudioSource
+from logger import logger
+from metrics import METRICS
+
+FIRST_AUDIO_SECONDS = METRICS.histogram(
+    'fakabot_time_to_first_audio_seconds', 'Time from starting playback on an idle session to its first audio packet'
+)
+TRANSITION_SECONDS = METRICS.histogram(
+    'fakabot_track_transition_seconds', 'Gap between the end of a track (or a skip) and the first packet of the next'
+)
+
+
+class PlaybackScheduler:
+    def __init__(self, play_next: Callable[..., Awaitable[None]], history: int = 1000):
+        self.play_next = play_next
+        self.latencies: deque[float] = deque(maxlen=history)
+        self.stale_events = 0
+        self.tasks: set[asyncio.Task] = set()
+
+    def finished_callback(self, session: GuildSession) -> Callable[[Exception | None], None]:
+        return functools.partial(self._track_finished, asyncio.get_running_loop(), session, session.generation)
+
+    def _track_finished(
+        self, loop: asyncio.AbstractEventLoop, session: GuildSession, generation: int, error: Exception | None
+    ):
+        ended = time.monotonic()
+        if error is not None:
+            logger.error(f"Player error in guild {session.guild_id}: {error!r}")
+        try:
+            loop.call_soon_threadsafe(self._dispatch, session, generation, ended)
+        except RuntimeError:
+            logger.debug(f"Event loop closed, dropping track end for guild {session.guild_id}")
+
+    def _dispatch(self, session: GuildSession, generation: int, ended: float):
+        task = asyncio.create_task(self.advance(session=session, generation=generation, ended=ended))
+        self.tasks.add(task)
+        task.add_done_callback(self._advance_done)
+
+    def _advance_done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Playback transition failed: {task.exception()!r}")
+
+    async def advance(
+        self, session: GuildSession, generation: int | None = None, ended: float | None = None, offset: float = 0.0
+    ):
+        async with session.transition_lock:
+            if generation is not None and generation != session.generation:
+                self.stale_events += 1
+                return
+            session.transition_started = (ended, True) if ended is not None else (time.monotonic(), False)
+            await self.play_next(session=session, offset=offset)
+
+    def track_source(self, session: GuildSession, source: AudioSource) -> AudioSource:
+        started, session.transition_started = session.transition_started, None
+        if started is None:
+            return source
+        return TimedAudioSource(source, on_first_packet=functools.partial(self._first_packet, *started))
+
+    def _first_packet(self, started: float, transition: bool):
+        latency = time.monotonic() - started
+        if transition:
+            self.latencies.append(latency)
+            TRANSITION_SECONDS.observe(latency)
+        else:
+            FIRST_AUDIO_SECONDS.observe(latency)
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {'transitions': 0, 'stale_events': self.stale_events}
+        return {
+            'transitions': len(latencies),
+            'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+            'max_ms': round(latencies[-1] * 1000, 3),
+            'stale_events': self.stale_events,
+        }
@@ -0,0 +1,42 @@
+import asyncio
+import functools
+
+from discord_api.src.GuildSession import GuildSession
+from logger import logger
+from youtube_api.async_api import AsyncYoutubeApi
+
+
+class Prefetcher:
+    def __init__(self, youtube_api: AsyncYoutubeApi, depth: int = 2):
+        self.youtube_api = youtube_api
+        self.depth = depth
+        self.tasks: dict[int, dict[str, asyncio.Task]] = {}
+
+    def update(self, session: GuildSession):
+        tasks = self.tasks.setdefault(session.guild_id, {})
+        upcoming = {}
+        for priority, video in enumerate(session.queue.page(0, self.depth), start=1):
+            upcoming.setdefault(video.id, (priority, video))
+        # A prefetch of the track that just started playing is handed over to the player rather than cancelled
+        current_id = session.current_video.id if session.current_video is not None else None
+        for video_id in list(tasks):
+            if video_id not in upcoming and video_id != current_id:
+                tasks.pop(video_id).cancel()
+        for video_id, (priority, video) in upcoming.items():
+            if video_id in tasks or self.youtube_api.is_cached(video):
+                continue
+            logger.debug(f"Prefetching {video_id} for guild {session.guild_id} with priority {priority}")
+            task = asyncio.create_task(self.youtube_api.get_video_file(video=video, priority=priority))
+            task.add_done_callback(functools.partial(self._prefetch_done, tasks=tasks, video_id=video_id))
+            tasks[video_id] = task
+
+    def cancel(self, session: GuildSession):
+        for task in self.tasks.pop(session.guild_id, {}).values():
+            task.cancel()
+
+    @staticmethod
+    def _prefetch_done(task: asyncio.Task, tasks: dict[str, asyncio.Task], video_id: str):
+        if tasks.get(video_id) is task:
+            del tasks[video_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Prefetch of {video_id} failed: {task.exception()!r}")
@@ -0,0 +1,144 @@
+import json
+import os
+from collections import deque
+from pathlib import Path
+from typing import Iterable, TextIO
+
+from discord_api.models import SessionState
+from logger import logger
+from youtube_api.models import Video
+
+
+def encode_video(video: Video | None) -> list | None:
+    if video is None:
+        return None
+    return [video.id, video.title, video.duration, video.thumbnail_url]
+
+
+def decode_video(data: list | None) -> Video | None:
+    if data is None:
+        return None
+    video_id, title, duration, thumbnail_url = data
+    return Video(id=video_id, title=title, duration=duration, thumbnail_url=thumbnail_url)
+
+
+class SessionStore:
+    def __init__(self, path: Path, compact_after: int = 1000):
+        self.path = path
+        self.compact_after = compact_after
+        self.operations = 0
+        self._file: TextIO | None = None
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.operations >= self.compact_after
+
+    def load(self) -> list[SessionState]:
+        try:
+            lines = self.path.read_text(encoding='utf-8').splitlines()
+        except FileNotFoundError:
+            return []
+        states: dict[int, dict] = {}
+        for line in lines:
+            try:
+                self._apply(states, json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f'Skipping unreadable session journal entry: {e!r}')
+        self.operations = len(lines)
+        logger.info(f'Loaded {len(states)} sessions from {self.path} ({len(lines)} journal entries)')
+        return [
+            SessionState(
+                guild_id=guild_id,
+                voice_channel_id=state['voice'],
+                text_channel_id=state['text'],
+                current_video=decode_video(state['current']),
+                offset=state['offset'],
+                queue=[decode_video(video) for video in state['queue']],
+            )
+            for guild_id, state in states.items()
+            if state['voice'] is not None
+        ]
+
+    @staticmethod
+    def _apply(states: dict[int, dict], record: dict):
+        guild_id, operation = record['g'], record['op']
+        if operation == 'detach':
+            states.pop(guild_id, None)
+            return
+        state = states.setdefault(
+            guild_id, {'voice': None, 'text': None, 'current': None, 'offset': 0.0, 'queue': deque()}
+        )
+        if operation == 'attach':
+            state['voice'], state['text'] = record['voice'], record['text']
+        elif operation == 'extend':
+            state['queue'].extend(record['videos'])
+        elif operation == 'queue':
+            state['queue'] = deque(record['videos'])
+        elif operation == 'play':
+            if record['video'] is not None and state['queue']:
+                state['queue'].popleft()
+            state['current'], state['offset'] = record['video'], 0.0
+        elif operation == 'position':
+            state['offset'] = record['offset']
+        elif operation == 'snapshot':
+            state.update(
+                voice=record['voice'],
+                text=record['text'],
+                current=record['current'],
+                offset=record['offset'],
+                queue=deque(record['queue']),
+            )
+
+    def _write(self, record: dict):
+        if self._file is None:
+            self._file = self.path.open('a', encoding='utf-8')
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        self.operations += 1
+
+    def attach(self, guild_id: int, voice_channel_id: int, text_channel_id: int | None):
+        self._write({'g': guild_id, 'op': 'attach', 'voice': voice_channel_id, 'text': text_channel_id})
+
+    def extend(self, guild_id: int, videos: Iterable[Video]):
+        self._write({'g': guild_id, 'op': 'extend', 'videos': [encode_video(video) for video in videos]})
+
+    def replace_queue(self, guild_id: int, videos: Iterable[Video]):
+        self._write({'g': guild_id, 'op': 'queue', 'videos': [encode_video(video) for video in videos]})
+
+    def play(self, guild_id: int, video: Video | None):
+        self._write({'g': guild_id, 'op': 'play', 'video': encode_video(video)})
+
+    def position(self, guild_id: int, offset: float):
+        self._write({'g': guild_id, 'op': 'position', 'offset': round(offset, 1)})
+
+    def detach(self, guild_id: int):
+        self._write({'g': guild_id, 'op': 'detach'})
+
+    def compact(self, states: Iterable[SessionState]):
+        temp_file = self.path.with_suffix('.tmp')
+        count = 0
+        with temp_file.open('w', encoding='utf-8') as file:
+            for state in states:
+                record = {
+                    'g': state.guild_id,
+                    'op': 'snapshot',
+                    'voice': state.voice_channel_id,
+                    'text': state.text_channel_id,
+                    'current': encode_video(state.current_video),
+                    'offset': round(state.offset, 1),
+                    'queue': [encode_video(video) for video in state.queue],
+                }
+                file.write(json.dumps(record, separators=(',', ':')) + '\n')
+                count += 1
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        os.replace(temp_file, self.path)
+        self.operations = count
+        logger.info(f'Compacted session journal to {count} snapshots')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,110 @@
+import os
+import signal
+import subprocess
+import time
+
+from logger import logger
+
+
+class ShardProcess:
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.process: subprocess.Popen | None = None
+        self.started_at = 0.0
+        self.restart_at: float | None = None
+        self.restart_delay = 0.0
+        self.restarts = 0
+        self.finished = False
+
+
+class ShardSupervisor:
+    def __init__(
+        self,
+        command: list[str],
+        shard_count: int,
+        start_interval: float = 5,
+        restart_delay: float = 5,
+        max_restart_delay: float = 300,
+        stable_after: float = 60,
+        stop_timeout: float = 30,
+    ):
+        self.command = command
+        self.shard_count = shard_count
+        self.start_interval = start_interval
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stable_after = stable_after
+        self.stop_timeout = stop_timeout
+        self.shards = [ShardProcess(shard_id=shard_id) for shard_id in range(shard_count)]
+        self._stopping = False
+
+    def start(self, shard: ShardProcess):
+        env = os.environ | {'SHARD_ID': str(shard.shard_id), 'SHARD_COUNT': str(self.shard_count)}
+        shard.process = subprocess.Popen(self.command, env=env)
+        shard.started_at = time.monotonic()
+        shard.restart_at = None
+        logger.info(f'Started shard {shard.shard_id}/{self.shard_count} (pid {shard.process.pid})')
+
+    def check(self, shard: ShardProcess, now: float):
+        if shard.finished:
+            return
+        if shard.process is None:
+            if shard.restart_at is not None and now >= shard.restart_at:
+                self.start(shard)
+            return
+        code = shard.process.poll()
+        if code is None:
+            return
+        shard.process = None
+        if code == 0:
+            logger.info(f'Shard {shard.shard_id} exited cleanly')
+            shard.finished = True
+            return
+        if now - shard.started_at >= self.stable_after:
+            shard.restart_delay = self.restart_delay
+        else:
+            shard.restart_delay = min(self.max_restart_delay, max(self.restart_delay, shard.restart_delay * 2))
+        shard.restart_at = now + shard.restart_delay
+        shard.restarts += 1
+        logger.error(f'Shard {shard.shard_id} exited with code {code}, restarting in {shard.restart_delay:g}s')
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_sigterm)
+        try:
+            for index, shard in enumerate(self.shards):
+                if index:
+                    time.sleep(self.start_interval)
+                self.start(shard)
+            while not self._stopping and not all(shard.finished for shard in self.shards):
+                time.sleep(1)
+                now = time.monotonic()
+                for shard in self.shards:
+                    self.check(shard, now)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _handle_sigterm(self, _signum, _frame):
+        self._stopping = True
+
+    def stop(self):
+        running = [shard.process for shard in self.shards if shard.process is not None and shard.process.poll() is None]
+        logger.info(f'Stopping {len(running)} shards')
+        for process in running:
+            process.send_signal(signal.SIGINT)
+        deadline = time.monotonic() + self.stop_timeout
+        for process in running:
+            try:
+                process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning(f'Shard process {process.pid} did not stop in time, killing it')
+                process.kill()
+                process.wait()
+
+    def stats(self) -> dict:
+        return {
+            'shards': self.shard_count,
+            'running': sum(shard.process is not None and shard.process.poll() is None for shard in self.shards),
+            'restarts': sum(shard.restarts for shard in self.shards),
+        }
@@ -0,0 +1,22 @@
+from typing import Callable
+
+from discord import AudioSource
+
+
+class TimedAudioSource(AudioSource):
+    def __init__(self, source: AudioSource, on_first_packet: Callable[[], None]):
+        self.source = source
+        self._on_first_packet: Callable[[], None] | None = on_first_packet
+
+    def read(self) -> bytes:
+        data = self.source.read()
+        if self._on_first_packet is not None:
+            on_first_packet, self._on_first_packet = self._on_first_packet, None
+            on_first_packet()
+        return data
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self):
+        self.source.cleanup()
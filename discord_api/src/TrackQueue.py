@@ -0,0 +1,95 @@
+import random
+from collections import Counter, deque
+from itertools import islice
+from typing import Iterable, Iterator
+
+from youtube_api.models import Video
+
+
+class TrackQueue:
+    def __init__(self, videos: Iterable[Video] = ()):
+        self._videos: deque[Video] = deque()
+        self._counts: Counter[str] = Counter()
+        self.extend(videos)
+
+    def __len__(self) -> int:
+        return len(self._videos)
+
+    def __bool__(self) -> bool:
+        return bool(self._videos)
+
+    def __iter__(self) -> Iterator[Video]:
+        return iter(self._videos)
+
+    def __getitem__(self, position: int) -> Video:
+        return self._videos[position]
+
+    def __contains__(self, video_id: str) -> bool:
+        return self._counts[video_id] > 0
+
+    def count(self, video_id: str) -> int:
+        return self._counts[video_id]
+
+    def append(self, video: Video):
+        self._videos.append(video)
+        self._counts[video.id] += 1
+
+    def extend(self, videos: Iterable[Video]):
+        for video in videos:
+            self.append(video)
+
+    def popleft(self) -> Video:
+        video = self._videos.popleft()
+        self._forget(video)
+        return video
+
+    def insert(self, position: int, video: Video):
+        self._videos.insert(position, video)
+        self._counts[video.id] += 1
+
+    def remove(self, position: int) -> Video:
+        video = self._videos[position]
+        del self._videos[position]
+        self._forget(video)
+        return video
+
+    def move(self, source: int, target: int) -> Video:
+        video = self._videos[source]
+        del self._videos[source]
+        self._videos.insert(target, video)
+        return video
+
+    def shuffle(self, rng: random.Random | None = None):
+        videos = list(self._videos)
+        (rng or random).shuffle(videos)
+        self._videos = deque(videos)
+
+    def dedupe(self) -> int:
+        if len(self._counts) == len(self._videos):
+            return 0
+        unique: dict[str, Video] = {}
+        for video in self._videos:
+            unique.setdefault(video.id, video)
+        removed = len(self._videos) - len(unique)
+        self._videos = deque(unique.values())
+        self._counts = Counter(unique.keys())
+        return removed
+
+    def clear(self):
+        self._videos.clear()
+        self._counts.clear()
+
+    def page(self, start: int, size: int) -> list[Video]:
+        if start > len(self._videos) // 2:
+            tail = len(self._videos) - start
+            if tail <= 0:
+                return []
+            videos = list(islice(reversed(self._videos), max(0, tail - size), tail))
+            videos.reverse()
+            return videos
+        return list(islice(self._videos, start, start + size))
+
+    def _forget(self, video: Video):
+        self._counts[video.id] -= 1
+        if self._counts[video.id] <= 0:
+            del self._counts[video.id]
@@ -1 +1,12 @@
+from .TrackQueue import TrackQueue
 from .PlaySelector import PlaySelector
+from .GuildSession import GuildSession
+from .Prefetcher import Prefetcher
+from .CommandParser import CommandParser
+from .SessionStore import SessionStore
+from .TimedAudioSource import TimedAudioSource
+from .OggOpusAudio import OggOpusAudio
+from .PlaybackScheduler import PlaybackScheduler
+from .InactivityReaper import InactivityReaper
+from .ShardSupervisor import ShardSupervisor
+from .LiveMessage import LiveMessage
@@ -1,7 +1,11 @@
+import atexit
+import json
 import logging
 import os
-import platform
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,112 +23,134 @@ ITALIC = '\033[3m'
 UNDERLINE = '\033[4m'
 ENDC = '\033[0m'
 
-# Get logger
-logger = logging.getLogger()
-
 # Set labels
 timestamp_format = '%Y-%m-%d %H:%M:%S'
 timestamp = '[%(asctime)s.%(msecs)03d]'
 header_label = '[DRY ]' if os.getenv('DRY_RUN') == 'True' else '[LIVE]'
+shard_id = os.getenv('SHARD_ID')
+if shard_id is not None:
+    header_label = f'{header_label} [S{int(shard_id):02d}]'
 origin_label = '[%(filename)-18.18s:%(lineno)-4.4d] [%(funcName)-30.30s]'
 level_label = '[%(levelname)-4.4s]'
 
 
 # Create formatters
 level = '(LEVEL)'
-
-platform_name = platform.uname().system.lower()
-if platform_name == 'linux':
-    stream_formatter_template = f'{timestamp} {header_label} {origin_label} {level_label} %(message)s'
+level_colors = {
+    logging.DEBUG: DEBUG,
+    logging.INFO: INFO,
+    logging.WARNING: WARNING,
+    logging.ERROR: ERROR,
+}
+
+plain_formatter_template = f'{timestamp} {header_label} {origin_label} {level_label} %(message)s'
+if sys.platform.startswith('linux'):
+    stream_formatter_template = plain_formatter_template
 else:
     stream_formatter_template = f'{TIMESTAMP}{timestamp}{ENDC} {HEADER}{header_label}{ENDC} {ORIGIN}{origin_label}{ENDC} {level}{level_label}{ENDC} %(message)s'
-    # stream_formatter_template = f'{stream_formatter_template} %(name)s'
-
-stream_debug_format = stream_formatter_template.replace(level, DEBUG)
-stream_info_format = stream_formatter_template.replace(level, INFO)
-stream_warning_format = stream_formatter_template.replace(level, WARNING)
-stream_error_format = stream_formatter_template.replace(level, ERROR)
-
-stream_debug_formatter = logging.Formatter(stream_debug_format, datefmt=timestamp_format)
-stream_info_formatter = logging.Formatter(stream_info_format, datefmt=timestamp_format)
-stream_warning_formatter = logging.Formatter(stream_warning_format, datefmt=timestamp_format)
-stream_error_formatter = logging.Formatter(stream_error_format, datefmt=timestamp_format)
 
 
-# Create handlers
-stream_debug_handler = logging.StreamHandler(sys.stdout)
-stream_info_handler = logging.StreamHandler(sys.stdout)
-stream_warning_handler = logging.StreamHandler(sys.stderr)
-stream_error_handler = logging.StreamHandler(sys.stderr)
+class LevelFormatter(logging.Formatter):
+    def __init__(self, template: str):
+        super().__init__(template.replace(level, ''), datefmt=timestamp_format)
+        self.formatters = {
+            levelno: logging.Formatter(template.replace(level, color), datefmt=timestamp_format)
+            for levelno, color in level_colors.items()
+        }
+
+    def format(self, record: logging.LogRecord) -> str:
+        formatter = self.formatters.get(record.levelno)
+        if formatter is None:
+            return super().format(record)
+        return formatter.format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': self.formatTime(record, timestamp_format) + f'.{int(record.msecs):03d}',
+            'mode': header_label[1:5].strip(),
+            'shard': int(shard_id) if shard_id is not None else None,
+            'level': record.levelname,
+            'logger': record.name,
+            'file': record.filename,
+            'line': record.lineno,
+            'function': record.funcName,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class BelowLevelFilter(logging.Filter):
+    def __init__(self, levelno: int):
+        super().__init__()
+        self.levelno = levelno
 
-# Set formatters
-stream_debug_handler.setFormatter(stream_debug_formatter)
-stream_info_handler.setFormatter(stream_info_formatter)
-stream_warning_handler.setFormatter(stream_warning_formatter)
-stream_error_handler.setFormatter(stream_error_formatter)
-
-# Set logging levels
-stream_debug_handler.setLevel(logging.DEBUG)
-stream_info_handler.setLevel(logging.INFO)
-stream_warning_handler.setLevel(logging.WARNING)
-stream_error_handler.setLevel(logging.ERROR)
-
-
-# Create filters
-class DebugFilter(logging.Filter):
     def filter(self, record):
-        return record.levelno == logging.DEBUG
+        return record.levelno < self.levelno
 
 
-class InfoFilter(logging.Filter):
-    def filter(self, record):
-        return record.levelno == logging.INFO
+json_output = os.getenv('LOG_JSON') == 'True'
+stream_formatter = JsonFormatter() if json_output else LevelFormatter(stream_formatter_template)
+file_formatter = JsonFormatter() if json_output else LevelFormatter(plain_formatter_template)
 
 
-class WarningFilter(logging.Filter):
-    def filter(self, record):
-        return record.levelno == logging.WARNING
+# Create one handler per sink
+stdout_handler = logging.StreamHandler(sys.stdout)
+stdout_handler.setFormatter(stream_formatter)
+stdout_handler.addFilter(BelowLevelFilter(logging.WARNING))
 
+stderr_handler = logging.StreamHandler(sys.stderr)
+stderr_handler.setFormatter(stream_formatter)
+stderr_handler.setLevel(logging.WARNING)
 
-class ErrorFilter(logging.Filter):
-    def filter(self, record):
-        return record.levelno == logging.ERROR
-
-
-# Set filters
-stream_debug_handler.addFilter(DebugFilter())
-stream_info_handler.addFilter(InfoFilter())
-stream_warning_handler.addFilter(WarningFilter())
-stream_error_handler.addFilter(ErrorFilter())
+handlers: list[logging.Handler] = [stdout_handler, stderr_handler]
 
-
-# Add handlers to logger
-logger.handlers = [
-    stream_debug_handler,
-    stream_info_handler,
-    stream_warning_handler,
-    stream_error_handler,
-]
-
-# Set logger level
-logger.setLevel(logging.DEBUG)
-logger.propagate = False
+if os.getenv('LOG_FILE') == 'True':
+    log_file_path, log_file_extension = os.path.splitext(os.getenv('LOG_FILE_PATH', 'logs.log'))
+    if shard_id is not None:
+        log_file_path = f'{log_file_path}.shard-{shard_id}'
+    file_handler = RotatingFileHandler(
+        log_file_path + log_file_extension,
+        maxBytes=int(os.getenv('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024)),
+        backupCount=int(os.getenv('LOG_FILE_BACKUPS', 5)),
+        encoding='utf-8',
+    )
+    file_handler.setFormatter(file_formatter)
+    handlers.append(file_handler)
+
+
+# Format and write records on a background thread
+class LogQueueHandler(QueueHandler):
+    exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+queue_handler = LogQueueHandler(log_queue)
+listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+root_logger = logging.getLogger()
+root_logger.handlers = [queue_handler]
+root_logger.setLevel(os.getenv('LOG_LEVEL', 'DEBUG'))
 
 # Loggers to disable
 loggers_to_disable = [
-    # 'server',
-    # 'uvicorn',
-    # 'gunicorn',
     # 'httpx',
     # 'requests',
-    # 'httpcore.connection',
-    # 'httpcore.http11',
     # 'asyncio',
-    # 'datadog.api',
-    # 'datadog.util',
-    # 'datadog.dogstatsd',
-    # 'sqlalchemy.engine',
-    # 'sqlalchemy.engine.Engine',
     # 'urllib3.connectionpool',
     # 'discord.voice_state',
     # 'discord.player',
@@ -136,46 +162,4 @@ for logger_name in loggers_to_disable:
     logging.getLogger(logger_name).disabled = True
     logging.getLogger(logger_name).setLevel(logging.WARNING)
 
-
-if os.getenv('LOG_FILE') == 'True':
-    file_formatter_template = f'{timestamp} {header_label} {origin_label} {level_label} %(message)s'
-
-    file_debug_format = file_formatter_template.replace(level, DEBUG)
-    file_info_format = file_formatter_template.replace(level, INFO)
-    file_warning_format = file_formatter_template.replace(level, WARNING)
-    file_error_format = file_formatter_template.replace(level, ERROR)
-
-    file_debug_formatter = logging.Formatter(file_debug_format, datefmt=timestamp_format)
-    file_info_formatter = logging.Formatter(file_info_format, datefmt=timestamp_format)
-    file_warning_formatter = logging.Formatter(file_warning_format, datefmt=timestamp_format)
-    file_error_formatter = logging.Formatter(file_error_format, datefmt=timestamp_format)
-
-    file_debug_handler = logging.FileHandler('logs.log', mode='w', encoding='utf-8')
-    file_info_handler = logging.FileHandler('logs.log', mode='w', encoding='utf-8')
-    file_warning_handler = logging.FileHandler('logs.log', mode='w', encoding='utf-8')
-    file_error_handler = logging.FileHandler('logs.log', mode='w', encoding='utf-8')
-
-    file_debug_handler.setFormatter(file_debug_formatter)
-    file_info_handler.setFormatter(file_info_formatter)
-    file_warning_handler.setFormatter(file_warning_formatter)
-    file_error_handler.setFormatter(file_error_formatter)
-
-    file_debug_handler.setLevel(logging.DEBUG)
-    file_info_handler.setLevel(logging.INFO)
-    file_warning_handler.setLevel(logging.WARNING)
-    file_error_handler.setLevel(logging.ERROR)
-
-    file_debug_handler.addFilter(DebugFilter())
-    file_info_handler.addFilter(InfoFilter())
-    file_warning_handler.addFilter(WarningFilter())
-    file_error_handler.addFilter(ErrorFilter())
-
-    logger.handlers.extend([
-        file_debug_handler,
-        file_info_handler,
-        file_warning_handler,
-        file_error_handler,
-    ])
-
-logger = logging.getLogger('sqlalchemy.engine')
-logger.setLevel(logging.DEBUG)
+logger = logging.getLogger('fakabot')
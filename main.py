@@ -1,20 +1,46 @@
+import sys
+from pathlib import Path
+
 from discord import Intents
 
 from discord_api.api import Client
+from discord_api.src import ShardSupervisor
+from metrics import METRICS
 from settings import SETTINGS
-from youtube_api.api import YOUTUBE_API
+from youtube_api.async_api import get_async_youtube_api
+
+
+def supervise():
+    supervisor = ShardSupervisor(
+        command=[sys.executable, str(Path(__file__).resolve())],
+        shard_count=SETTINGS.SHARD_COUNT,
+        start_interval=SETTINGS.SHARD_START_INTERVAL,
+        restart_delay=SETTINGS.SHARD_RESTART_DELAY,
+        max_restart_delay=SETTINGS.SHARD_MAX_RESTART_DELAY,
+    )
+    supervisor.run()
 
 
 def main():
+    if SETTINGS.SHARD_COUNT > 1 and SETTINGS.SHARD_ID is None:
+        supervise()
+        return
+    if SETTINGS.METRICS_ENABLED:
+        METRICS.serve(host=SETTINGS.METRICS_HOST, port=SETTINGS.METRICS_PORT + (SETTINGS.SHARD_ID or 0))
+        if SETTINGS.METRICS_DUMP_PATH:
+            METRICS.dump_every(
+                path=SETTINGS.shard_path(SETTINGS.METRICS_DUMP_PATH), interval=SETTINGS.METRICS_DUMP_INTERVAL
+            )
     intents = Intents.default()
     intents.message_content = True
-    client = Client(intents=intents)
-    client.run(SETTINGS.DISCORD_BOT_TOKEN)
-    # print(YOUTUBE_API.refresh_token)
-    # YOUTUBE_API.refresh_access_token()
+    shard_options = {}
+    if SETTINGS.SHARD_ID is not None:
+        shard_options = {'shard_id': SETTINGS.SHARD_ID, 'shard_count': SETTINGS.SHARD_COUNT}
+    client = Client(intents=intents, youtube_api=get_async_youtube_api(), **shard_options)
+    client.run(SETTINGS.DISCORD_BOT_TOKEN, log_handler=None)
+    # print(get_youtube_api().refresh_token)
+    # get_youtube_api().refresh_access_token()
 
 
 if __name__ == '__main__':
     main()
-
-
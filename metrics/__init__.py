@@ -0,0 +1 @@
+from .metrics import METRICS, Registry, Counter, Histogram
@@ -1,3 +1,6 @@
+from pathlib import Path
+from typing import Literal, Optional
+
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
@@ -19,6 +22,45 @@ class Settings(BaseSettings):
     YOUTUBE_CLIENT_ID: str
     YOUTUBE_CLIENT_SECRET: str
     YOUTUBE_REFRESH_TOKEN: str
+    YOUTUBE_EXTRA_API_KEYS: list[str] = []
+
+    YOUTUBE_API_WORKERS: int = 4
+    YOUTUBE_DOWNLOAD_WORKERS: int = 2
+    YOUTUBE_API_BATCH_WORKERS: int = 4
+
+    PLAYBACK_MODE: Literal['download', 'stream'] = 'stream'
+    CACHE_WRITE_THROUGH: bool = True
+    PREFETCH_DEPTH: int = 2
+    PLAYLIST_MAX_AHEAD: int = 200
+    AUDIO_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
+    AUDIO_CACHE_POLICY: Literal['lru', 'lfu'] = 'lru'
+    AUDIO_CACHE_FORMAT: Literal['mp3', 'opus'] = 'opus'
+    METADATA_CACHE_VIDEO_TTL: int = 7 * 24 * 60 * 60
+    METADATA_CACHE_SEARCH_TTL: int = 24 * 60 * 60
+    METADATA_CACHE_PLAYLIST_TTL: int = 60 * 60
+    METADATA_BACKENDS: list[Literal['api_key', 'oauth', 'ytdlp']] = ['api_key', 'oauth', 'ytdlp']
+    METADATA_QUOTA_COOLDOWN: int = 60 * 60
+    SESSION_JOURNAL_PATH: str = 'discord_api/cache/sessions.journal'
+    SESSION_CHECKPOINT_INTERVAL: int = 10
+    SESSION_JOURNAL_COMPACT_AFTER: int = 1000
+    INACTIVITY_TIMEOUT: int = 5 * 60
+    MESSAGE_EDIT_INTERVAL: float = 2.0
+    METRICS_ENABLED: bool = False
+    METRICS_HOST: str = '127.0.0.1'
+    METRICS_PORT: int = 9464
+    METRICS_DUMP_PATH: str = ''
+    METRICS_DUMP_INTERVAL: int = 60
+    SHARD_COUNT: int = 1
+    SHARD_ID: Optional[int] = None
+    SHARD_START_INTERVAL: int = 5
+    SHARD_RESTART_DELAY: int = 5
+    SHARD_MAX_RESTART_DELAY: int = 5 * 60
+
+    def shard_path(self, path: str) -> Path:
+        path = Path(path)
+        if self.SHARD_ID is None:
+            return path
+        return path.with_name(f'{path.stem}.shard-{self.SHARD_ID}{path.suffix}')
 
 
 SETTINGS = Settings()
@@ -0,0 +1,26 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.fakes import build_youtube_api
+from youtube_api.models import Video
+from youtube_api.src import AudioCache
+
+
+class AudioCacheShutdownTest(unittest.TestCase):
+    def test_close_writes_pending_hits(self):
+        work_directory = tempfile.TemporaryDirectory(prefix="fakabot-test-")
+        self.addCleanup(work_directory.cleanup)
+        api = build_youtube_api(directory=Path(work_directory.name))
+        video = Video(id="cached00001", duration=60, title="Cached")
+        api.get_video_file(video)
+        for _ in range(3):
+            api.get_video_file(video)
+
+        api.close()
+        reloaded = AudioCache(directory=api.downloads_cache_path, max_bytes=api.audio_cache.max_bytes)
+        self.assertEqual(reloaded.entries[video.id].hits, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
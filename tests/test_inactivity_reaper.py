@@ -0,0 +1,26 @@
+import unittest
+
+from discord_api.src import GuildSession, InactivityReaper
+
+
+class InactivityReaperStatsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_forgotten_sessions_are_not_reported_as_timers(self):
+        reaped = []
+
+        async def on_idle(session: GuildSession):
+            reaped.append(session)
+
+        reaper = InactivityReaper(timeout=60, on_idle=on_idle)
+        self.addCleanup(reaper.stop)
+        sessions = [GuildSession(guild_id=guild_id) for guild_id in range(1, 4)]
+        for session in sessions:
+            reaper.touch(session)
+        reaper.forget(sessions[0])
+        reaper.forget(sessions[1])
+
+        stats = reaper.stats()
+        self.assertEqual(stats["timers"], 1)
+        self.assertEqual(stats["sessions"], 1)
+        # Stale heap entries stay until their deadline passes
+        self.assertEqual(stats["heap_entries"], 3)
+        self.assertEqual(reaped, [])
@@ -0,0 +1,46 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from youtube_api.models import Video
+from youtube_api.src import MetadataCache
+
+
+class MetadataCacheExpiryTest(unittest.TestCase):
+    def setUp(self):
+        work_directory = tempfile.TemporaryDirectory(prefix="fakabot-test-")
+        self.addCleanup(work_directory.cleanup)
+        self.path = Path(work_directory.name) / "metadata.sqlite3"
+
+    def open(self, **ttls) -> MetadataCache:
+        cache = MetadataCache(path=self.path, **({"video_ttl": 60, "search_ttl": 60, "playlist_ttl": 60} | ttls))
+        self.addCleanup(cache.connection.close)
+        return cache
+
+    def count(self, cache: MetadataCache, table: str) -> int:
+        return cache.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_expired_rows_are_purged_when_the_cache_opens(self):
+        cache = self.open()
+        cache.set_videos([Video(id="old", duration=1, title="Old")])
+        cache.set_playlist(playlist_id="PL1", video_ids=["old"])
+        cache.connection.execute("UPDATE videos SET fetched_at = ?", [time.time() - 120])
+
+        reopened = self.open()
+        self.assertEqual(self.count(reopened, "videos"), 0)
+        self.assertEqual(self.count(reopened, "playlists"), 1)
+
+    def test_expired_rows_are_purged_while_running(self):
+        cache = self.open()
+        cache.set_search(query="old", region_code="AR", video_ids=["old"])
+        cache.connection.execute("UPDATE searches SET fetched_at = ?", [time.time() - 120])
+        cache.purged_at -= cache.purge_interval
+
+        cache.set_search(query="new", region_code="AR", video_ids=["new"])
+        self.assertEqual(self.count(cache, "searches"), 1)
+        self.assertEqual(cache.get_search(query="new", region_code="AR"), ["new"])
+
+
+if __name__ == "__main__":
+    unittest.main()
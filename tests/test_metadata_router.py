@@ -0,0 +1,35 @@
+import unittest
+
+from benchmarks.fakes import FakeDataApi, FakeYtDlpBackend, build_youtube_api, playlist_video_id
+from youtube_api.src import DataApiBackend, MetadataRouter
+
+
+class PlaylistFailoverTest(unittest.TestCase):
+    def build(self, quota_after: int):
+        data_api = FakeDataApi(playlist_size=120, quota_after=quota_after)
+        api = build_youtube_api(data_api=data_api)
+        ytdlp = FakeYtDlpBackend(data_api=data_api)
+        api.metadata = MetadataRouter(
+            backends=[DataApiBackend(name="fake", clients=[data_api]), ytdlp],
+            record_call=api.metadata_cache.record_call,
+        )
+        return api, ytdlp
+
+    def test_failover_partway_through_playlist_resumes_at_offset(self):
+        api, ytdlp = self.build(quota_after=1)
+        expected = [playlist_video_id("PL1", index) for index in range(120)]
+
+        self.assertEqual(api.get_all_videos_in_playlist(playlist_id="PL1"), expected)
+        self.assertEqual(ytdlp.extractions[0], {"playliststart": 51, "playlistend": 100})
+        self.assertEqual(api.metadata_cache.get_playlist(playlist_id="PL1"), expected)
+
+    def test_ytdlp_pages_carry_their_own_offsets(self):
+        api, ytdlp = self.build(quota_after=0)
+        expected = [playlist_video_id("PL2", index) for index in range(120)]
+
+        self.assertEqual(api.get_all_videos_in_playlist(playlist_id="PL2"), expected)
+        self.assertEqual([options["playliststart"] for options in ytdlp.extractions], [1, 51, 101])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from benchmarks.fakes import write_opus_track
+from discord_api.src import OggOpusAudio
+
+
+def frame_number(packet: bytes) -> int:
+    return struct.unpack(">I", packet[1:5])[0]
+
+
+class OggOpusSeekTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        work_directory = tempfile.TemporaryDirectory(prefix="fakabot-test-")
+        cls.addClassCleanup(work_directory.cleanup)
+        cls.path = write_opus_track(Path(work_directory.name) / "track.opus", seconds=600)
+
+    def open(self, offset: float) -> OggOpusAudio:
+        source = OggOpusAudio(self.path, offset=offset)
+        self.addCleanup(source.cleanup)
+        return source
+
+    def test_seek_lands_on_the_requested_frame(self):
+        for offset in (0.5, 7.3, 301.0, 599.9):
+            with self.subTest(offset=offset):
+                packet = self.open(offset=offset).read()
+                self.assertAlmostEqual(frame_number(packet) * 0.02, offset, delta=0.15)
+
+    def test_seek_only_skips_packets_within_one_page(self):
+        # Each page of the test track holds 127 packets, about 2.5s of audio
+        with mock.patch.object(OggOpusAudio, "skip", autospec=True) as skip:
+            source = self.open(offset=550.0)
+        self.assertLess(skip.call_args.args[1], 2.6)
+        self.assertGreater(source._file.tell(), self.path.stat().st_size * 0.9)
+
+    def test_seek_past_the_end_reads_nothing(self):
+        self.assertEqual(self.open(offset=700.0).read(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
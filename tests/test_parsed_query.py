@@ -0,0 +1,25 @@
+import unittest
+
+from benchmarks.url_parsing import CORPUS, VIDEO_ID
+from discord_api.models import ParsedQuery, QueryKind
+
+
+class ParsedQueryTest(unittest.TestCase):
+    def test_corpus(self):
+        for query, kind, video_id, playlist_id in CORPUS:
+            with self.subTest(query=query):
+                parsed = ParsedQuery.from_query(query)
+                self.assertEqual((parsed.kind, parsed.video_id, parsed.playlist_id), (kind, video_id, playlist_id))
+
+    def test_host_is_case_insensitive_and_ports_are_ignored(self):
+        parsed = ParsedQuery.from_query(f"HTTPS://WWW.YouTube.com:443/watch?v={VIDEO_ID}&index=4")
+        self.assertEqual(parsed, ParsedQuery(QueryKind.VIDEO, parsed.text, VIDEO_ID, None, 4))
+
+    def test_lookalike_hosts_are_searches(self):
+        for query in (f"https://notyoutube.com/watch?v={VIDEO_ID}", f"https://youtube.com.evil.net/watch?v={VIDEO_ID}"):
+            with self.subTest(query=query):
+                self.assertEqual(ParsedQuery.from_query(query).kind, QueryKind.SEARCH)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import discord_api.api
+from benchmarks.fakes import FakeAudioSource, FakeGuild, build_youtube_api
+from discord import Intents
+from discord_api.api import Client
+from discord_api.src import SessionStore
+from settings import SETTINGS
+from youtube_api.async_api import AsyncYoutubeApi
+from youtube_api.models import Video
+
+BROKEN = Video(id="broken00001", duration=200, title="Broken track")
+GOOD = Video(id="good0000001", duration=180, title="Good track")
+NEXT = Video(id="next0000001", duration=180, title="Next track")
+
+
+class PlaybackTestCase(unittest.IsolatedAsyncioTestCase):
+    api_options: dict = {}
+
+    async def asyncSetUp(self):
+        work_directory = tempfile.TemporaryDirectory(prefix="fakabot-test-")
+        self.addCleanup(work_directory.cleanup)
+        for name in ("FFmpegPCMAudio", "FFmpegOpusAudio"):
+            patcher = mock.patch.object(discord_api.api, name, FakeAudioSource)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        api = build_youtube_api(directory=Path(work_directory.name), **self.api_options)
+        self.youtube_api = AsyncYoutubeApi(api=api)
+        self.client = Client(intents=Intents.default(), youtube_api=self.youtube_api)
+        self.client.session_store = SessionStore(path=Path(work_directory.name) / "sessions.journal")
+        self.addCleanup(self.client.session_store.close)
+        self.guild = FakeGuild(guild_id=1)
+
+    async def asyncTearDown(self):
+        # Prefetches keep downloading in the background, let them finish before the directory goes away
+        self.youtube_api.executor.shutdown(wait=True)
+
+
+class FailedTrackTest(PlaybackTestCase):
+    api_options = {"broken": frozenset({BROKEN.id})}
+
+    async def test_failed_first_track_advances_to_next(self):
+        await self.client.add_videos_to_queue(videos=[BROKEN, GOOD], message=self.guild.message("faka play"))
+
+        session = self.client.sessions[self.guild.id]
+        self.assertEqual(session.current_video, GOOD)
+        self.assertTrue(session.is_playing())
+        self.assertEqual(len(session.queue), 0)
+        self.assertIn("No se pudo reproducir Broken track", self.guild.text_channel.sent[0].content)
+
+    async def test_failed_only_track_does_not_block_later_enqueues(self):
+        await self.client.add_videos_to_queue(videos=[BROKEN], message=self.guild.message("faka play"))
+
+        session = self.client.sessions[self.guild.id]
+        self.assertIsNone(session.current_video)
+        self.assertFalse(session.is_playing())
+
+        await self.client.add_videos_to_queue(videos=[GOOD], message=self.guild.message("faka play"))
+        self.assertEqual(session.current_video, GOOD)
+        self.assertTrue(session.is_playing())
+
+
+class PrefetchSkipTest(PlaybackTestCase):
+    api_options = {"download_delays": {NEXT.id: 0.5}}
+
+    async def wait_for(self, condition, timeout: float = 5.0):
+        async with asyncio.timeout(timeout):
+            while not condition():
+                await asyncio.sleep(0.01)
+
+    async def test_skip_while_next_track_prefetch_is_in_flight(self):
+        with mock.patch.object(SETTINGS, "PLAYBACK_MODE", "download"):
+            playing = asyncio.create_task(
+                self.client.add_videos_to_queue(videos=[GOOD, NEXT], message=self.guild.message("faka play"))
+            )
+            await self.wait_for(lambda: self.guild.id in self.client.sessions)
+            session = self.client.sessions[self.guild.id]
+            await self.wait_for(session.is_playing)
+            await playing
+            self.assertIn(NEXT.id, self.youtube_api.downloads)
+
+            await self.client.on_message(self.guild.message("faka skip"))
+            await self.wait_for(lambda: session.current_video == NEXT and session.is_playing())
+            self.assertTrue(self.youtube_api.is_cached(NEXT))
+
+
+class PlaylistIngestTest(PlaybackTestCase):
+    async def test_ingestion_stops_when_the_session_loses_voice(self):
+        with mock.patch.multiple(SETTINGS, PLAYLIST_MAX_AHEAD=10, MESSAGE_EDIT_INTERVAL=0):
+            session = self.client.get_session(self.guild.id)
+            ingest = asyncio.create_task(
+                self.client.ingest_playlist(
+                    session=session, playlist_id="PL1", start=0, message=self.guild.message("faka play")
+                )
+            )
+            async with asyncio.timeout(5):
+                while not session.queue:
+                    await asyncio.sleep(0.01)
+            session.voice_client = None
+            session.queue_changed.set()
+            await ingest
+            await asyncio.sleep(0.05)
+
+        # The page fetched while waiting for room in the queue is dropped, the other two are never requested
+        self.assertEqual(self.youtube_api.api.data_api.requests["playlistItems.list"], 2)
+        titles = [message.embed.title for message in self.guild.text_channel.sent if message.embed is not None]
+        self.assertIn("Playlist interrumpida: 50 canciones agregadas", titles)
+
+
+if __name__ == "__main__":
+    unittest.main()
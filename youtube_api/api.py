@@ -1,161 +1,329 @@
-import json
+import functools
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from threading import Thread
+from threading import Event
+from typing import Iterator
 from urllib.parse import urlparse, parse_qs
 
-import yt_dlp
-
-from datetime import datetime, timedelta
-from pyyoutube import Client, PyYouTubeException
 from logger import logger
+from metrics import METRICS
 from settings import SETTINGS
-from youtube_api.models import Video
+from youtube_api.models import AudioStream, Video
+from youtube_api.src import AudioCache, DataApiBackend, MetadataCache, MetadataRouter, TokenManager, YtDlpBackend
+
+CACHE_FORMAT_QUALITY = {'mp3': '192', 'opus': '128'}
+DOWNLOAD_SECONDS = METRICS.histogram(
+    'fakabot_download_seconds',
+    'Time spent downloading and transcoding audio files',
+    ('stage',),
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0),
+)
 
 
 class YoutubeApi:
-    def __init__(self, api_key: str, client_id: str, client_secret: str, refresh_token: str, channel_id: str):
+    def __init__(
+        self,
+        api_key: str,
+        client_id: str,
+        client_secret: str,
+        refresh_token: str,
+        channel_id: str,
+        cache_max_bytes: int = 2 * 1024 ** 3,
+        cache_policy: str = 'lru',
+        cache_format: str = 'opus',
+        shared_cache: bool = False,
+        video_ttl: int = 7 * 86400,
+        search_ttl: int = 86400,
+        playlist_ttl: int = 3600,
+        batch_workers: int = 4,
+        extra_api_keys: list[str] = (),
+        backends: list[str] = ('api_key', 'oauth', 'ytdlp'),
+        quota_cooldown: int = 3600,
+        cache_directory: Path = Path('youtube_api/cache'),
+    ):
+        from pyyoutube import Client
+        from requests.adapters import HTTPAdapter
+
         self.channel_id = channel_id
+        self.cache_format = cache_format
         self.api_key_client = Client(api_key=api_key)
+        self.api_key_clients = [self.api_key_client, *(Client(api_key=key) for key in extra_api_keys)]
         self.oauth_client = Client(client_id=client_id, client_secret=client_secret)
-        self.refresh_token = refresh_token
-        self.access_token = None
-        self.expire_datetime = None
-        self.downloads_cache_path = Path('youtube_api/cache/downloads')
-        self.access_token_cache_file = Path('youtube_api/cache/access_token.json')
-        self.read_access_token()
-
-    def read_access_token(self):
-        try:
-            logger.info('Reading access token from file')
-            data = json.loads(self.access_token_cache_file.read_text())
-            self.access_token = data['access_token']
-            self.expire_datetime = datetime.fromisoformat(data['expire_datetime'])
-            self.oauth_client.access_token = self.access_token
-            logger.info('Successfully read access token from file')
-        except FileNotFoundError:
-            logger.info('Access token file not found')
-
-    def save_access_token(self):
-        logger.info('Saving access token to file')
-        json_data = {
-            'access_token': self.access_token,
-            'expire_datetime': self.expire_datetime.isoformat()
+        for client in (*self.api_key_clients, self.oauth_client):
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=batch_workers)
+            client.session.mount('https://', adapter)
+        self.batch_executor = ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix='youtube_api_batch')
+        self.downloads_cache_path = cache_directory / 'downloads'
+        self.audio_cache = AudioCache(
+            directory=self.downloads_cache_path, max_bytes=cache_max_bytes, policy=cache_policy, shared=shared_cache
+        )
+        self.metadata_cache = MetadataCache(
+            path=cache_directory / 'metadata.sqlite3',
+            video_ttl=video_ttl,
+            search_ttl=search_ttl,
+            playlist_ttl=playlist_ttl,
+        )
+        self.token_manager = TokenManager(
+            client=self.oauth_client,
+            refresh_token=refresh_token,
+            cache_file=cache_directory / 'access_token.json',
+        )
+        available_backends = {
+            'api_key': lambda: DataApiBackend(name='api_key', clients=self.api_key_clients, cooldown=quota_cooldown),
+            'oauth': lambda: DataApiBackend(
+                name='oauth', clients=[self.oauth_client], cooldown=quota_cooldown, before_call=self.refresh_access_token
+            ),
+            'ytdlp': YtDlpBackend,
         }
-        self.access_token_cache_file.write_text(json.dumps(json_data))
-        logger.info('Successfully saved access token to file')
-
-    def refresh_access_token(self):
-        if self.expire_datetime is None or self.expire_datetime < datetime.now():
-            logger.info('Refreshing access token')
-            access_token_object = self.oauth_client.refresh_access_token(refresh_token=self.refresh_token)
-            print(access_token_object)
-            self.expire_datetime = datetime.now() + timedelta(seconds=access_token_object.expires_in)
-            self.access_token = access_token_object.access_token
-            self.oauth_client.access_token = self.access_token
-            self.save_access_token()
-            logger.info('Successfully refreshed access token')
-        else:
-            logger.info('Reusing access token')
+        self.metadata = MetadataRouter(
+            backends=[available_backends[name]() for name in backends], record_call=self.metadata_cache.record_call
+        )
+        self.register_metrics()
+
+    def register_metrics(self):
+        METRICS.callback(
+            'fakabot_audio_cache_requests_total',
+            'Audio cache lookups by result',
+            lambda: {('hit',): self.audio_cache.hits, ('miss',): self.audio_cache.misses},
+            labelnames=('result',),
+            kind='counter',
+        )
+        METRICS.callback(
+            'fakabot_audio_cache_bytes', 'Bytes stored in the audio cache', lambda: {(): self.audio_cache.total_bytes}
+        )
+        METRICS.callback(
+            'fakabot_audio_cache_evictions_total',
+            'Files evicted from the audio cache to stay under its size limit',
+            lambda: {(): self.audio_cache.evictions},
+            kind='counter',
+        )
+        METRICS.callback(
+            'fakabot_audio_cache_evicted_bytes_total',
+            'Bytes evicted from the audio cache to stay under its size limit',
+            lambda: {(): self.audio_cache.evicted_bytes},
+            kind='counter',
+        )
+        METRICS.callback(
+            'fakabot_metadata_cache_requests_total',
+            'Metadata cache lookups by result',
+            lambda: {('hit',): self.metadata_cache.hits, ('miss',): self.metadata_cache.misses},
+            labelnames=('result',),
+            kind='counter',
+        )
+        METRICS.callback(
+            'fakabot_youtube_quota_units_total',
+            'YouTube Data API quota units used and saved by the metadata cache',
+            lambda: {('used',): self.metadata_cache.quota_used, ('saved',): self.metadata_cache.quota_saved},
+            labelnames=('kind',),
+            kind='counter',
+        )
+        METRICS.callback(
+            'fakabot_metadata_backend_quota_errors_total',
+            'Quota errors returned to each metadata backend',
+            lambda: {(backend.name,): backend.quota_errors for backend in self.metadata.backends},
+            labelnames=('backend',),
+            kind='counter',
+        )
+        METRICS.callback(
+            'fakabot_youtube_token_refreshes_total',
+            'OAuth access token refreshes by result',
+            lambda: {('ok',): self.token_manager.refreshes, ('failed',): self.token_manager.failures},
+            labelnames=('result',),
+            kind='counter',
+        )
+
+    def refresh_access_token(self) -> str:
+        return self.token_manager.get()
 
-        return self.access_token
+    def close(self):
+        self.token_manager.stop()
+        self.audio_cache.flush()
 
     def search(self, query: str, max_results: int = 5, region_code: str = 'AR') -> list[Video]:
-        self.refresh_access_token()
         logger.info(f'Searching for "{query}"')
-        search = self.oauth_client.search.list(q=query, part='snippet', maxResults=20, regionCode=region_code)
-        video_ids = [item.id.videoId for item in search.items if item.id.videoId is not None][:max_results]
-        results = self.get_video_content_details(video_ids=video_ids)
+        video_ids = self.metadata_cache.get_search(query=query, region_code=region_code)
+        if video_ids is None:
+            video_ids = self.metadata.search(query=query, region_code=region_code, max_results=20)
+            self.metadata_cache.set_search(query=query, region_code=region_code, video_ids=video_ids)
+        else:
+            self.metadata_cache.record_saved('search.list')
+        results = self.get_video_content_details(video_ids=video_ids[:max_results])
         logger.info(f'Search results for "{query}". Found {len(results)} videos')
-        print(results)
         return results
 
     def get_video_from_id(self, video_id: str) -> Video:
-        self.refresh_access_token()
         logger.info(f"Getting video from ID {video_id}")
-        video = self.get_video_content_details(video_ids=[video_id])[0]
+        videos = self.get_video_content_details(video_ids=[video_id])
+        if not videos:
+            raise ValueError(f'Video {video_id} is unavailable')
+        video = videos[0]
         logger.info(f'Got video from ID {video_id}')
         return video
 
     def get_all_videos_in_playlist(self, playlist_id: str) -> list[str]:
+        return [video_id for page in self.iter_playlist_pages(playlist_id=playlist_id) for video_id in page]
+
+    def iter_playlist_pages(self, playlist_id: str, page_size: int = 50) -> Iterator[list[str]]:
+        video_ids = self.metadata_cache.get_playlist(playlist_id=playlist_id)
+        if video_ids is not None:
+            self.metadata_cache.record_saved('playlistItems.list', count=max(1, math.ceil(len(video_ids) / page_size)))
+            for start in range(0, len(video_ids), page_size):
+                yield video_ids[start:start + page_size]
+            return
         do_request = True
+        complete = True
         next_page_token = None
         video_ids = []
         while do_request:
-            self.refresh_access_token()
             logger.info(f'Getting videos from playlist {playlist_id}')
             try:
-                playlist = self.oauth_client.playlistItems.list(playlist_id=playlist_id, part='snippet', max_results=50, page_token=next_page_token)
-            except PyYouTubeException as e:
+                page, next_page_token = self.metadata.playlist_page(
+                    playlist_id=playlist_id, page_size=page_size, page_token=next_page_token
+                )
+            except Exception as e:
                 logger.error(f'Error getting videos from playlist {playlist_id}: {e}')
+                complete = False
                 break
-            video_ids += [item.snippet.resourceId.videoId for item in playlist.items]
-            next_page_token = playlist.nextPageToken
+            video_ids += page
+            for start in range(0, len(page), page_size):
+                yield page[start:start + page_size]
             do_request = next_page_token is not None
-        return video_ids
+        if complete:
+            self.metadata_cache.set_playlist(playlist_id=playlist_id, video_ids=video_ids)
 
     def get_playlist_videos_from_url(self, url: str) -> list[Video]:
-        self.refresh_access_token()
+        results = [video for batch in self.iter_playlist_videos_from_url(url=url) for video in batch]
+        logger.info(f'Got videos from playlist URL {url}. Found {len(results)} videos')
+        return results
+
+    def iter_playlist_videos_from_url(self, url: str) -> Iterator[list[Video]]:
         logger.info(f'Getting videos from playlist URL {url}')
         parsed_url = urlparse(url)
         playlist_id = parse_qs(parsed_url.query)['list'][0]
-        index = int(parse_qs(parsed_url.query).get('index', [0])[0]) + 1 if 'index' in parse_qs(parsed_url.query) else 0
-        playlist_video_ids = self.get_all_videos_in_playlist(playlist_id=playlist_id)
-        results = self.get_video_content_details(video_ids=playlist_video_ids[index:])
-        logger.info(f'Got videos from playlist URL {url}. Found {len(results)} videos')
-        return results
+        start = int(parse_qs(parsed_url.query).get('index', [0])[0]) + 1 if 'index' in parse_qs(parsed_url.query) else 0
+        return self.iter_playlist_videos(playlist_id=playlist_id, start=start)
+
+    def iter_playlist_videos(self, playlist_id: str, start: int = 0) -> Iterator[list[Video]]:
+        skip = start
+        for page in self.iter_playlist_pages(playlist_id=playlist_id):
+            if skip >= len(page):
+                skip -= len(page)
+                continue
+            page, skip = page[skip:], 0
+            yield self.get_video_content_details(video_ids=page)
 
     def get_video_content_details(self, video_ids: list[str]) -> list[Video]:
-        self.refresh_access_token()
-        logger.info(f'Getting video content details for {video_ids}')
+        logger.info(f'Getting video content details for {len(video_ids)} videos')
         batch_size = 50
-        batches = [video_ids[i:i + batch_size] for i in range(0, len(video_ids), batch_size)]
-        videos = []
-        for batch in batches:
-            response = self.oauth_client.videos.list(part='snippet,contentDetails', video_id=','.join(batch))
-            videos += response.items
-        logger.info(f'Got video content details for {video_ids}')
-        results = []
-        for video_id, item in zip(video_ids, videos):
-            results.append(Video(
-                id=video_id,
-                title=item.snippet.title,
-                duration=item.contentDetails.get_video_seconds_duration(),
-                thumbnail_url=item.snippet.thumbnails.default.url,
-            ))
-        return results
+        videos = self.metadata_cache.get_videos(video_ids=video_ids)
+        unique_ids = list(dict.fromkeys(video_ids))
+        missing_ids = [video_id for video_id in unique_ids if video_id not in videos]
+        saved_batches = math.ceil(len(unique_ids) / batch_size) - math.ceil(len(missing_ids) / batch_size)
+        if saved_batches:
+            self.metadata_cache.record_saved('videos.list', count=saved_batches)
+        if missing_ids:
+            batches = [missing_ids[i:i + batch_size] for i in range(0, len(missing_ids), batch_size)]
+            fetched = [video for batch in self.batch_executor.map(self.metadata.videos, batches) for video in batch]
+            self.metadata_cache.set_videos(videos=fetched)
+            videos.update({video.id: video for video in fetched})
+            unavailable_ids = [video_id for video_id in missing_ids if video_id not in videos]
+            if unavailable_ids:
+                logger.warning(f'{len(unavailable_ids)} videos are unavailable: {unavailable_ids}')
+        logger.info(f'Got video content details for {len(videos)} of {len(unique_ids)} videos')
+        return [videos[video_id] for video_id in video_ids if video_id in videos]
 
-    def get_video_file(self, video: Video) -> Path:
-        if not video.cache_path.exists():
-            self.download_video(video=video)
-        return video.cache_path
+    def get_video_file(self, video: Video, cancel_event: Event | None = None) -> Path:
+        path = self.audio_cache.get(video.id)
+        if path is None:
+            path = self.download_video(video=video, cancel_event=cancel_event)
+        return path
 
-    def download_video(self, video: Video):
-        self._download_video_from_url(url=video.url, path=video.cache_path)
+    def get_audio_stream(self, video: Video) -> AudioStream:
+        logger.info(f'Resolving audio stream for {video.url}')
+        ydl_opts = {
+            "format": "bestaudio/best",
+            "noplaylist": True,
+            "quiet": True,
+        }
+        with self._youtube_dl(ydl_opts) as ydl:
+            info = ydl.extract_info(video.url, download=False)
+        stream = AudioStream(url=info['url'], codec=info.get('acodec'), container=info.get('ext'))
+        logger.info(f'Resolved audio stream for {video.url}. Codec: {stream.codec}, container: {stream.container}')
+        return stream
+
+    def download_video(self, video: Video, cancel_event: Event | None = None) -> Path:
+        temp_file = self.audio_cache.temp_path(video.id, suffix=f'.{self.cache_format}')
+        try:
+            self._download_video_from_url(url=video.url, path=temp_file, cancel_event=cancel_event)
+            return self.audio_cache.put(video=video, temp_file=temp_file)
+        finally:
+            for leftover in temp_file.parent.glob(f'{temp_file.stem}*'):
+                leftover.unlink(missing_ok=True)
 
     @staticmethod
-    def _download_video_from_url(url: str, path: Path):
+    def _youtube_dl(options: dict):
+        import yt_dlp
+
+        return yt_dlp.YoutubeDL(options)
+
+    def _download_video_from_url(self, url: str, path: Path, cancel_event: Event | None = None):
+        from yt_dlp.utils import DownloadCancelled
+
         logger.info(f'Downloading video from {url}. Path: {path}')
+
+        def check_cancelled(_progress: dict):
+            if cancel_event is not None and cancel_event.is_set():
+                raise DownloadCancelled(f'Download of {url} cancelled')
+
+        def on_progress(progress: dict):
+            check_cancelled(progress)
+            if progress.get('status') == 'finished':
+                stages.setdefault('downloaded', time.perf_counter())
+
+        codec = path.suffix.lstrip('.')
         ydl_opts = {
             "format": "bestaudio/best",
             "outtmpl": path.with_suffix("").as_posix(),
             "postprocessors": [
                 {
                     "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "192",
+                    "preferredcodec": codec,
+                    "preferredquality": CACHE_FORMAT_QUALITY[codec],
                 }
             ],
+            "progress_hooks": [on_progress],
+            "postprocessor_hooks": [check_cancelled],
         }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        stages = {'started': time.perf_counter()}
+        with self._youtube_dl(ydl_opts) as ydl:
             ydl.download([url])
+        finished = time.perf_counter()
+        downloaded = stages.get('downloaded', finished)
+        DOWNLOAD_SECONDS.observe(downloaded - stages['started'], 'download')
+        DOWNLOAD_SECONDS.observe(finished - downloaded, 'transcode')
         logger.info(f"Downloaded video from {url}. Path: {path}")
 
 
-YOUTUBE_API = YoutubeApi(
-    api_key=SETTINGS.YOUTUBE_API_KEY,
-    client_id=SETTINGS.YOUTUBE_CLIENT_ID,
-    client_secret=SETTINGS.YOUTUBE_CLIENT_SECRET,
-    refresh_token=SETTINGS.YOUTUBE_REFRESH_TOKEN,
-    channel_id=SETTINGS.YOUTUBE_CHANNEL_ID,
-)
+@functools.cache
+def get_youtube_api() -> YoutubeApi:
+    return YoutubeApi(
+        api_key=SETTINGS.YOUTUBE_API_KEY,
+        client_id=SETTINGS.YOUTUBE_CLIENT_ID,
+        client_secret=SETTINGS.YOUTUBE_CLIENT_SECRET,
+        refresh_token=SETTINGS.YOUTUBE_REFRESH_TOKEN,
+        channel_id=SETTINGS.YOUTUBE_CHANNEL_ID,
+        cache_max_bytes=SETTINGS.AUDIO_CACHE_MAX_BYTES,
+        cache_policy=SETTINGS.AUDIO_CACHE_POLICY,
+        cache_format=SETTINGS.AUDIO_CACHE_FORMAT,
+        shared_cache=SETTINGS.SHARD_COUNT > 1,
+        video_ttl=SETTINGS.METADATA_CACHE_VIDEO_TTL,
+        search_ttl=SETTINGS.METADATA_CACHE_SEARCH_TTL,
+        playlist_ttl=SETTINGS.METADATA_CACHE_PLAYLIST_TTL,
+        batch_workers=SETTINGS.YOUTUBE_API_BATCH_WORKERS,
+        extra_api_keys=SETTINGS.YOUTUBE_EXTRA_API_KEYS,
+        backends=SETTINGS.METADATA_BACKENDS,
+        quota_cooldown=SETTINGS.METADATA_QUOTA_COOLDOWN,
+    )
 
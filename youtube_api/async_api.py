@@ -0,0 +1,160 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Event
+from typing import AsyncIterator, Callable
+
+from logger import logger
+from settings import SETTINGS
+from youtube_api.api import YoutubeApi, get_youtube_api
+from youtube_api.models import AudioStream, Video
+from youtube_api.src import PrioritySemaphore
+
+
+class CallTiming:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float, failed: bool = False):
+        self.count += 1
+        self.errors += failed
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def __repr__(self) -> str:
+        return f'CallTiming(count={self.count}, errors={self.errors}, mean={self.mean:.3f}s, max={self.max:.3f}s)'
+
+
+class PendingDownload:
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.requesters = 0
+        self.started = False
+        self.task: asyncio.Task | None = None
+
+
+class AsyncYoutubeApi:
+    def __init__(self, api: YoutubeApi, max_workers: int = 4, max_downloads: int = 2):
+        self.api = api
+        self.executor = ThreadPoolExecutor(max_workers=max_workers + max_downloads, thread_name_prefix='youtube_api')
+        self.api_semaphore = asyncio.Semaphore(max_workers)
+        self.download_semaphore = PrioritySemaphore(max_downloads)
+        self.downloads: dict[str, PendingDownload] = {}
+        self.timings: dict[str, CallTiming] = {}
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.api.close()
+
+    async def _run(self, name: str, func: Callable, **kwargs):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await loop.run_in_executor(self.executor, functools.partial(func, **kwargs))
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings.setdefault(name, CallTiming()).record(elapsed, failed=failed)
+            logger.debug(f'{name} took {elapsed:.3f}s')
+
+    async def _run_api(self, name: str, func: Callable, **kwargs):
+        async with self.api_semaphore:
+            return await self._run(name, func, **kwargs)
+
+    async def search(self, query: str, max_results: int = 5, region_code: str = 'AR') -> list[Video]:
+        return await self._run_api(
+            'search', self.api.search, query=query, max_results=max_results, region_code=region_code,
+        )
+
+    async def get_video_from_id(self, video_id: str) -> Video:
+        return await self._run_api('get_video_from_id', self.api.get_video_from_id, video_id=video_id)
+
+    async def get_playlist_videos_from_url(self, url: str) -> list[Video]:
+        return await self._run_api('get_playlist_videos_from_url', self.api.get_playlist_videos_from_url, url=url)
+
+    async def iter_playlist_videos(self, playlist_id: str, start: int = 0) -> AsyncIterator[list[Video]]:
+        batches = self.api.iter_playlist_videos(playlist_id=playlist_id, start=start)
+        try:
+            while True:
+                batch = await self._run_api('iter_playlist_videos', functools.partial(next, batches, None))
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            try:
+                batches.close()
+            except ValueError:
+                logger.debug(f'Playlist iterator for {playlist_id} is still running, leaving it to finish')
+
+    async def get_video_content_details(self, video_ids: list[str]) -> list[Video]:
+        return await self._run_api(
+            'get_video_content_details', self.api.get_video_content_details, video_ids=video_ids,
+        )
+
+    async def get_audio_stream(self, video: Video) -> AudioStream:
+        return await self._run_api('get_audio_stream', self.api.get_audio_stream, video=video)
+
+    def is_cached(self, video: Video) -> bool:
+        return self.api.audio_cache.contains(video.id)
+
+    async def get_video_file(self, video: Video, priority: int = 0) -> Path:
+        if self.is_cached(video):
+            path = self.api.audio_cache.get(video.id)
+            if path is not None:
+                return path
+        download = self.downloads.get(video.id)
+        if download is not None and (download.task.done() or download.task.cancelling()):
+            # Being torn down after its last requester left, joining it would only raise CancelledError
+            download = None
+        if download is not None and priority < download.priority and not download.started:
+            logger.debug(f'Restarting queued download of {video.id} with priority {priority}')
+            download.task.cancel()
+            download = None
+        if download is None:
+            download = PendingDownload(priority=priority)
+            download.task = asyncio.create_task(self._download_video_file(video=video, download=download))
+            download.task.add_done_callback(functools.partial(self._download_done, video_id=video.id, download=download))
+            self.downloads[video.id] = download
+        download.requesters += 1
+        try:
+            return await asyncio.shield(download.task)
+        finally:
+            download.requesters -= 1
+            if download.requesters == 0 and not download.task.done():
+                logger.info(f'Cancelling download of {video.id}')
+                download.task.cancel()
+
+    def _download_done(self, task: asyncio.Task, video_id: str, download: PendingDownload):
+        if self.downloads.get(video_id) is download:
+            del self.downloads[video_id]
+
+    async def _download_video_file(self, video: Video, download: PendingDownload) -> Path:
+        async with self.download_semaphore.slot(priority=download.priority):
+            download.started = True
+            cancel_event = Event()
+            try:
+                return await self._run('get_video_file', self.api.get_video_file, video=video, cancel_event=cancel_event)
+            except asyncio.CancelledError:
+                cancel_event.set()
+                raise
+
+
+@functools.cache
+def get_async_youtube_api() -> AsyncYoutubeApi:
+    return AsyncYoutubeApi(
+        api=get_youtube_api(),
+        max_workers=SETTINGS.YOUTUBE_API_WORKERS,
+        max_downloads=SETTINGS.YOUTUBE_DOWNLOAD_WORKERS,
+    )
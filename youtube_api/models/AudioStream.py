@@ -0,0 +1,13 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class AudioStream(BaseModel):
+    url: str
+    codec: Optional[str] = None
+    container: Optional[str] = None
+
+    @property
+    def is_opus(self) -> bool:
+        return self.codec == 'opus' and self.container == 'webm'
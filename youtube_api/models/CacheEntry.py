@@ -0,0 +1,11 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class CacheEntry(BaseModel):
+    filename: str
+    size: int
+    last_access: float
+    hits: int = 0
+    duration: Optional[int] = None
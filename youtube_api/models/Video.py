@@ -1,14 +1,59 @@
-from pathlib import Path
 from typing import Optional
 
-from pydantic import BaseModel
+DEFAULT_THUMBNAIL_URL = 'https://i.ytimg.com/vi/{}/default.jpg'
 
 
-class Video(BaseModel):
-    id: Optional[str] = None
-    duration: Optional[int] = None
-    thumbnail_url: Optional[str] = None
-    title: Optional[str] = None
+class Video:
+    # Queues and playlists hold thousands of these, so they are slotted and only keep non-default thumbnails
+    __slots__ = ('id', 'duration', 'title', '_thumbnail_url')
+
+    id: Optional[str]
+    duration: Optional[int]
+    title: Optional[str]
+    _thumbnail_url: Optional[str]
+
+    def __init__(
+        self,
+        id: Optional[str] = None,
+        duration: Optional[int] = None,
+        thumbnail_url: Optional[str] = None,
+        title: Optional[str] = None,
+    ):
+        if thumbnail_url is not None and id is not None and thumbnail_url == DEFAULT_THUMBNAIL_URL.format(id):
+            thumbnail_url = None
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'duration', duration)
+        object.__setattr__(self, 'title', title)
+        object.__setattr__(self, '_thumbnail_url', thumbnail_url)
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError(f'Video is immutable, cannot set {name}')
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f'Video is immutable, cannot delete {name}')
+
+    def _key(self) -> tuple:
+        return self.id, self.duration, self.title, self._thumbnail_url
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Video):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f'Video(id={self.id!r}, duration={self.duration!r}, title={self.title!r})'
+
+    def __reduce__(self):
+        return Video, (self.id, self.duration, self._thumbnail_url, self.title)
+
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        if self._thumbnail_url is None and self.id is not None:
+            return DEFAULT_THUMBNAIL_URL.format(self.id)
+        return self._thumbnail_url
 
     @property
     def url(self) -> str:
@@ -22,6 +67,5 @@ class Video(BaseModel):
     def label(self) -> str:
         return f'{self.title} ({self.duration_label})'
 
-    @property
-    def cache_path(self) -> Path:
-        return Path(f'youtube_api/cache/downloads/{self.id}.mp3')
+    def to_dict(self) -> dict:
+        return {'id': self.id, 'duration': self.duration, 'thumbnail_url': self.thumbnail_url, 'title': self.title}
@@ -1 +1,3 @@
 from .Video import Video
+from .AudioStream import AudioStream
+from .CacheEntry import CacheEntry
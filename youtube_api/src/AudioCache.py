@@ -0,0 +1,232 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Literal, Optional
+
+from logger import logger
+from youtube_api.models import CacheEntry, Video
+
+STALE_TEMP_SECONDS = 60 * 60
+
+
+class AudioCache:
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int,
+        policy: Literal['lru', 'lfu'] = 'lru',
+        flush_every: int = 20,
+        shared: bool = False,
+        suffixes: tuple[str, ...] = ('.opus', '.mp3'),
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.flush_every = flush_every
+        self.shared = shared
+        self.suffixes = suffixes
+        self.index_file = directory / 'index.json'
+        self.temp_directory = directory / 'tmp'
+        self.entries: dict[str, CacheEntry] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self._dirty = 0
+        self._lock = Lock()
+        self.load()
+
+    def load(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.shared:
+            self._remove_stale_temp_files()
+            self.entries = self._scan()
+            logger.info(f'Scanned shared audio cache with {len(self.entries)} entries')
+            self.total_bytes = sum(entry.size for entry in self.entries.values())
+            with self._lock:
+                self._evict()
+            return
+        shutil.rmtree(self.temp_directory, ignore_errors=True)
+        try:
+            data = json.loads(self.index_file.read_text())
+            self.entries = {video_id: CacheEntry(**entry) for video_id, entry in data.items()}
+            logger.info(f'Loaded audio cache index with {len(self.entries)} entries')
+        except FileNotFoundError:
+            logger.info('Audio cache index not found, rebuilding from disk')
+            self.entries = self._scan()
+            self.save()
+        except (ValueError, TypeError) as e:
+            logger.warning(f'Audio cache index is corrupt, rebuilding from disk: {e}')
+            self.entries = self._scan()
+            self.save()
+        self.total_bytes = sum(entry.size for entry in self.entries.values())
+        with self._lock:
+            self._evict()
+
+    def _scan(self) -> dict[str, CacheEntry]:
+        entries = {}
+        for path in self.directory.iterdir():
+            if not path.is_file() or path.suffix in ('.json', '.tmp'):
+                continue
+            stat = path.stat()
+            entries[path.stem] = CacheEntry(filename=path.name, size=stat.st_size, last_access=stat.st_mtime)
+        return entries
+
+    def _remove_stale_temp_files(self):
+        # Other processes may be downloading into the shared temp directory, only drop what they abandoned
+        oldest = time.time() - STALE_TEMP_SECONDS
+        for path in self.temp_directory.glob('*'):
+            try:
+                if path.stat().st_mtime < oldest:
+                    path.unlink()
+            except OSError:
+                continue
+
+    def _adopt(self, video_id: str) -> Optional[CacheEntry]:
+        for suffix in self.suffixes:
+            path = self.directory / f'{video_id}{suffix}'
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entry = CacheEntry(filename=path.name, size=stat.st_size, last_access=stat.st_mtime)
+            with self._lock:
+                if video_id not in self.entries:
+                    self.entries[video_id] = entry
+                    self.total_bytes += entry.size
+                return self.entries[video_id]
+        return None
+
+    def _rescan(self):
+        entries = self._scan()
+        for video_id, entry in entries.items():
+            known = self.entries.get(video_id)
+            if known is not None:
+                entry.hits = known.hits
+                entry.last_access = max(entry.last_access, known.last_access)
+                entry.duration = known.duration
+        self.entries = entries
+        self.total_bytes = sum(entry.size for entry in entries.values())
+
+    def save(self):
+        if self.shared:
+            self._dirty = 0
+            return
+        data = {video_id: entry.model_dump() for video_id, entry in self.entries.items()}
+        temp_file = self.index_file.with_suffix('.json.tmp')
+        temp_file.write_text(json.dumps(data, separators=(',', ':')))
+        os.replace(temp_file, self.index_file)
+        self._dirty = 0
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def contains(self, video_id: str) -> bool:
+        if video_id in self.entries:
+            return True
+        return self.shared and self._adopt(video_id) is not None
+
+    def get(self, video_id: str) -> Optional[Path]:
+        if self.shared and video_id not in self.entries:
+            self._adopt(video_id)
+        with self._lock:
+            entry = self.entries.get(video_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            path = self.directory / entry.filename
+            if not path.exists():
+                logger.warning(f'Cached file {path} disappeared, dropping it from the index')
+                self._remove(video_id)
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry.hits += 1
+            entry.last_access = time.time()
+            if self.shared:
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+            self._dirty += 1
+            if self._dirty >= self.flush_every:
+                self.save()
+            return path
+
+    def temp_path(self, video_id: str, suffix: str = '.mp3') -> Path:
+        self.temp_directory.mkdir(parents=True, exist_ok=True)
+        return self.temp_directory / f'{video_id}.{os.getpid()}.{time.monotonic_ns()}{suffix}'
+
+    def put(self, video: Video, temp_file: Path) -> Path:
+        path = self.directory / f'{video.id}{temp_file.suffix}'
+        size = temp_file.stat().st_size
+        os.replace(temp_file, path)
+        with self._lock:
+            if video.id in self.entries:
+                self._remove(video.id, delete=self.entries[video.id].filename != path.name)
+            if self.shared:
+                self._rescan()
+                if video.id in self.entries:
+                    self._remove(video.id)
+            self.entries[video.id] = CacheEntry(
+                filename=path.name,
+                size=size,
+                last_access=time.time(),
+                duration=video.duration,
+            )
+            self.total_bytes += size
+            self._evict(keep=video.id)
+            self.save()
+        logger.info(f'Cached {video.id} ({size} bytes). Cache size: {self.total_bytes}/{self.max_bytes} bytes')
+        return path
+
+    def _eviction_key(self, entry: CacheEntry) -> tuple:
+        if self.policy == 'lfu':
+            return entry.hits, entry.last_access
+        return (entry.last_access,)
+
+    def _evict(self, keep: Optional[str] = None):
+        if self.total_bytes <= self.max_bytes:
+            return
+        candidates = sorted(
+            (video_id for video_id in self.entries if video_id != keep),
+            key=lambda video_id: self._eviction_key(self.entries[video_id]),
+        )
+        for video_id in candidates:
+            if self.total_bytes <= self.max_bytes:
+                break
+            size = self.entries[video_id].size
+            if self._remove(video_id, delete=True):
+                self.evictions += 1
+                self.evicted_bytes += size
+                logger.info(f'Evicted {video_id} ({size} bytes) from the audio cache')
+        self._dirty += 1
+
+    def _remove(self, video_id: str, delete: bool = False) -> bool:
+        entry = self.entries[video_id]
+        if delete:
+            try:
+                (self.directory / entry.filename).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f'Could not evict {entry.filename}: {e}')
+                return False
+        del self.entries[video_id]
+        self.total_bytes -= entry.size
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'entries': len(self.entries),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'evicted_bytes': self.evicted_bytes,
+        }
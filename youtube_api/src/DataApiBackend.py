@@ -0,0 +1,111 @@
+import time
+from threading import Lock
+from typing import TYPE_CHECKING, Callable, Optional
+
+from logger import logger
+from youtube_api.models import Video
+from youtube_api.src.MetadataBackend import MetadataBackend, QuotaExceeded
+
+if TYPE_CHECKING:
+    from pyyoutube import Client, PyYouTubeException
+
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded', 'rateLimitExceeded', 'userRateLimitExceeded'}
+
+
+def is_quota_error(error: 'PyYouTubeException') -> bool:
+    from requests import Response
+
+    if error.status_code not in (403, 429):
+        return False
+    if isinstance(error.response, Response):
+        try:
+            reasons = {item.get('reason') for item in error.response.json()['error'].get('errors', [])}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            reasons = set()
+        if reasons & QUOTA_REASONS:
+            return True
+    return 'quota' in (error.message or '').lower()
+
+
+class DataApiBackend(MetadataBackend):
+    uses_quota = True
+
+    def __init__(self, name: str, clients: list['Client'], cooldown: int = 3600, before_call: Optional[Callable] = None):
+        super().__init__()
+        self.name = name
+        self.clients = clients
+        self.cooldown = cooldown
+        self.before_call = before_call
+        self.exhausted_until = [0.0] * len(clients)
+        self._next = 0
+        self._lock = Lock()
+
+    def _pick_client(self) -> int:
+        now = time.time()
+        with self._lock:
+            for _ in range(len(self.clients)):
+                index = self._next
+                self._next = (self._next + 1) % len(self.clients)
+                if self.exhausted_until[index] <= now:
+                    return index
+        raise QuotaExceeded(f'All {self.name} clients are out of quota')
+
+    def _request(self, request: Callable[['Client'], object]):
+        from pyyoutube import PyYouTubeException
+
+        for _ in range(len(self.clients)):
+            index = self._pick_client()
+            if self.before_call is not None:
+                self.before_call()
+            try:
+                return request(self.clients[index])
+            except PyYouTubeException as e:
+                if not is_quota_error(e):
+                    raise
+                logger.warning(f'{self.name} client {index} is out of quota, resting it for {self.cooldown}s')
+                with self._stats_lock:
+                    self.quota_errors += 1
+                self.exhausted_until[index] = time.time() + self.cooldown
+        raise QuotaExceeded(f'All {self.name} clients are out of quota')
+
+    def search(self, query: str, region_code: str, max_results: int) -> list[str]:
+        response = self._request(
+            lambda client: client.search.list(
+                q=query, part='snippet', maxResults=max_results, regionCode=region_code, return_json=True
+            )
+        )
+        return [item['id']['videoId'] for item in response.get('items', []) if item['id'].get('videoId')]
+
+    def playlist_page(self, playlist_id: str, page_size: int, page_token: Optional[str]) -> tuple[list[str], Optional[str]]:
+        response = self._request(
+            lambda client: client.playlistItems.list(
+                playlist_id=playlist_id, part='snippet', max_results=page_size, page_token=page_token, return_json=True
+            )
+        )
+        video_ids = [item['snippet']['resourceId']['videoId'] for item in response.get('items', [])]
+        return video_ids, response.get('nextPageToken')
+
+    def videos(self, video_ids: list[str]) -> list[Video]:
+        from pyyoutube.youtube_utils import get_video_duration
+
+        response = self._request(
+            lambda client: client.videos.list(
+                part='snippet,contentDetails', video_id=','.join(video_ids), return_json=True
+            )
+        )
+        return [
+            Video(
+                id=item['id'],
+                title=item['snippet']['title'],
+                duration=get_video_duration(item['contentDetails']['duration']),
+                thumbnail_url=item['snippet']['thumbnails']['default']['url'],
+            )
+            for item in response.get('items', [])
+        ]
+
+    def stats(self) -> dict:
+        now = time.time()
+        return super().stats() | {
+            'clients': len(self.clients),
+            'exhausted_clients': sum(until > now for until in self.exhausted_until),
+        }
@@ -0,0 +1,53 @@
+from threading import Lock
+from typing import Optional
+
+from youtube_api.models import Video
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+class MetadataBackend:
+    name = 'backend'
+    uses_quota = False
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.quota_errors = 0
+        self.quota_used = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._stats_lock = Lock()
+
+    def search(self, query: str, region_code: str, max_results: int) -> list[str]:
+        raise NotImplementedError
+
+    def playlist_page(self, playlist_id: str, page_size: int, page_token: Optional[str]) -> tuple[list[str], Optional[str]]:
+        raise NotImplementedError
+
+    def videos(self, video_ids: list[str]) -> list[Video]:
+        raise NotImplementedError
+
+    def playlist_offset_token(self, offset: int) -> Optional[str]:
+        # Page token that resumes a playlist at offset, or None when this backend cannot take over mid-playlist
+        return None
+
+    def record(self, elapsed: float, quota: int = 0, failed: bool = False):
+        with self._stats_lock:
+            self.calls += 1
+            self.errors += failed
+            self.quota_used += quota
+            self.total += elapsed
+            self.max = max(self.max, elapsed)
+
+    def stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'quota_errors': self.quota_errors,
+            'quota_used': self.quota_used,
+            'mean_ms': round(self.total / self.calls * 1000, 1) if self.calls else 0.0,
+            'max_ms': round(self.max * 1000, 1),
+        }
@@ -0,0 +1,127 @@
+import json
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from logger import logger
+from youtube_api.models import Video
+
+QUOTA_COSTS = {
+    'search.list': 100,
+    'videos.list': 1,
+    'playlistItems.list': 1,
+}
+
+
+class MetadataCache:
+    def __init__(self, path: Path, video_ttl: int, search_ttl: int, playlist_ttl: int, purge_interval: int = 86400):
+        self.path = path
+        self.ttls = {
+            'videos': video_ttl,
+            'searches': search_ttl,
+            'playlists': playlist_ttl,
+        }
+        self.hits = 0
+        self.misses = 0
+        self.quota_used = 0
+        self.quota_saved = 0
+        self.purge_interval = purge_interval
+        self.purged_at = 0.0
+        self._lock = Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        for table in self.ttls:
+            self.connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, fetched_at REAL NOT NULL)'
+            )
+        self.purge_expired()
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return ' '.join(query.casefold().split())
+
+    def _get(self, table: str, keys: list[str]) -> dict[str, str]:
+        if not keys:
+            return {}
+        oldest = time.time() - self.ttls[table]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.connection.execute(
+                    f'SELECT key, value FROM {table} WHERE fetched_at >= ? AND key IN ({placeholders})',
+                    [oldest, *chunk],
+                )
+                found.update(rows)
+        return found
+
+    def _set(self, table: str, items: dict[str, str]):
+        now = time.time()
+        with self._lock:
+            self.connection.executemany(
+                f'INSERT OR REPLACE INTO {table} (key, value, fetched_at) VALUES (?, ?, ?)',
+                [(key, value, now) for key, value in items.items()],
+            )
+        if now - self.purged_at >= self.purge_interval:
+            self.purge_expired()
+
+    def get_videos(self, video_ids: list[str]) -> dict[str, Video]:
+        rows = self._get('videos', list(dict.fromkeys(video_ids)))
+        self.hits += len(rows)
+        self.misses += len(set(video_ids)) - len(rows)
+        return {video_id: Video(**json.loads(value)) for video_id, value in rows.items()}
+
+    def set_videos(self, videos: list[Video]):
+        self._set('videos', {video.id: json.dumps(video.to_dict(), separators=(',', ':')) for video in videos})
+
+    def get_search(self, query: str, region_code: str) -> Optional[list[str]]:
+        return self._get_ids('searches', f'{region_code}:{self.normalize_query(query)}')
+
+    def set_search(self, query: str, region_code: str, video_ids: list[str]):
+        self._set('searches', {f'{region_code}:{self.normalize_query(query)}': json.dumps(video_ids)})
+
+    def get_playlist(self, playlist_id: str) -> Optional[list[str]]:
+        return self._get_ids('playlists', playlist_id)
+
+    def set_playlist(self, playlist_id: str, video_ids: list[str]):
+        self._set('playlists', {playlist_id: json.dumps(video_ids)})
+
+    def _get_ids(self, table: str, key: str) -> Optional[list[str]]:
+        value = self._get(table, [key]).get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    def record_call(self, endpoint: str, count: int = 1):
+        self.quota_used += QUOTA_COSTS[endpoint] * count
+
+    def record_saved(self, endpoint: str, count: int = 1):
+        saved = QUOTA_COSTS[endpoint] * count
+        self.quota_saved += saved
+        logger.debug(f'Metadata cache saved {saved} quota units on {endpoint}')
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        purged = 0
+        with self._lock:
+            self.purged_at = now
+            for table, ttl in self.ttls.items():
+                purged += self.connection.execute(f'DELETE FROM {table} WHERE fetched_at < ?', [now - ttl]).rowcount
+        if purged:
+            logger.info(f'Purged {purged} expired metadata cache rows')
+        return purged
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'quota_used': self.quota_used,
+            'quota_saved': self.quota_saved,
+        }
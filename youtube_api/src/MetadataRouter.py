@@ -0,0 +1,86 @@
+import time
+from typing import Callable, Optional, TypeVar
+
+from logger import logger
+from metrics import METRICS
+from youtube_api.models import Video
+from youtube_api.src.MetadataBackend import MetadataBackend, QuotaExceeded
+from youtube_api.src.MetadataCache import QUOTA_COSTS
+
+API_SECONDS = METRICS.histogram(
+    'fakabot_youtube_api_seconds', 'YouTube metadata call latency', ('endpoint', 'backend', 'outcome')
+)
+T = TypeVar('T')
+
+
+class MetadataRouter:
+    def __init__(self, backends: list[MetadataBackend], record_call: Optional[Callable[[str], None]] = None):
+        self.backends = backends
+        self.record_call = record_call
+
+    def search(self, query: str, region_code: str, max_results: int) -> list[str]:
+        return self._call(
+            'search.list',
+            lambda backend: backend.search(query=query, region_code=region_code, max_results=max_results),
+        )
+
+    def playlist_page(self, playlist_id: str, page_size: int, page_token: Optional[str]) -> tuple[list[str], Optional[str]]:
+        # Tokens only mean something to the backend that issued them, so they carry its name and the number of ids
+        # already returned. Another backend may only take over a playlist it can resume at that offset.
+        owner, consumed, owner_token = None, 0, None
+        if page_token is not None:
+            owner, consumed, owner_token = page_token.split(':', 2)
+            consumed = int(consumed)
+
+        def backend_token(backend: MetadataBackend) -> Optional[str]:
+            if owner is None:
+                return None
+            if backend.name == owner:
+                return owner_token
+            return backend.playlist_offset_token(consumed)
+
+        def request(backend: MetadataBackend) -> tuple[list[str], Optional[str]]:
+            video_ids, next_page_token = backend.playlist_page(
+                playlist_id=playlist_id, page_size=page_size, page_token=backend_token(backend)
+            )
+            if next_page_token is not None:
+                next_page_token = f'{backend.name}:{consumed + len(video_ids)}:{next_page_token}'
+            return video_ids, next_page_token
+
+        backends = [backend for backend in self.backends if owner is None or backend_token(backend) is not None]
+        return self._call('playlistItems.list', request, backends=backends)
+
+    def videos(self, video_ids: list[str]) -> list[Video]:
+        return self._call('videos.list', lambda backend: backend.videos(video_ids=video_ids))
+
+    def _call(
+        self, operation: str, request: Callable[[MetadataBackend], T], backends: list[MetadataBackend] | None = None
+    ) -> T:
+        last_error: Exception | None = None
+        for backend in self.backends if backends is None else backends:
+            start = time.perf_counter()
+            try:
+                result = request(backend)
+            except QuotaExceeded as e:
+                backend.record(time.perf_counter() - start)
+                API_SECONDS.observe(time.perf_counter() - start, operation, backend.name, 'quota')
+                logger.warning(f'{operation} skipped {backend.name}: {e}')
+                last_error = e
+                continue
+            except Exception as e:
+                backend.record(time.perf_counter() - start, failed=True)
+                API_SECONDS.observe(time.perf_counter() - start, operation, backend.name, 'error')
+                logger.warning(f'{operation} failed on {backend.name}, trying the next backend: {e!r}')
+                last_error = e
+                continue
+            elapsed = time.perf_counter() - start
+            quota = QUOTA_COSTS[operation] if backend.uses_quota else 0
+            backend.record(elapsed, quota=quota)
+            API_SECONDS.observe(elapsed, operation, backend.name, 'ok')
+            if quota and self.record_call is not None:
+                self.record_call(operation)
+            return result
+        raise last_error or QuotaExceeded(f'No metadata backends available for {operation}')
+
+    def stats(self) -> dict:
+        return {backend.name: backend.stats() for backend in self.backends}
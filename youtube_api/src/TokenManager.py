@@ -0,0 +1,101 @@
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from threading import Lock, Timer
+from typing import TYPE_CHECKING, Optional
+
+from logger import logger
+
+if TYPE_CHECKING:
+    from pyyoutube import Client
+
+
+class TokenManager:
+    def __init__(self, client: 'Client', refresh_token: str, cache_file: Path, refresh_margin: int = 300, retry_delay: int = 30):
+        self.client = client
+        self.refresh_token = refresh_token
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self.access_token: Optional[str] = None
+        self.expires_at = 0.0
+        self.refreshes = 0
+        self.failures = 0
+        self._lock = Lock()
+        self._timer: Optional[Timer] = None
+        self.load()
+
+    @property
+    def expire_datetime(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self.expires_at) if self.access_token is not None else None
+
+    def load(self):
+        try:
+            logger.info('Reading access token from file')
+            data = json.loads(self.cache_file.read_text())
+            self._set_token(data['access_token'], datetime.fromisoformat(data['expire_datetime']).timestamp())
+            logger.info('Successfully read access token from file')
+        except FileNotFoundError:
+            logger.info('Access token file not found')
+        except (ValueError, KeyError) as e:
+            logger.warning(f'Access token file is corrupt, ignoring it: {e!r}')
+
+    def save(self):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        data = {'access_token': self.access_token, 'expire_datetime': self.expire_datetime.isoformat()}
+        temp_file = self.cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        temp_file.write_text(json.dumps(data))
+        os.replace(temp_file, self.cache_file)
+
+    def get(self) -> str:
+        if time.time() < self.expires_at:
+            return self.access_token
+        return self.refresh(force=False)
+
+    def refresh(self, force: bool = True) -> str:
+        stale_token = self.access_token
+        with self._lock:
+            if self.access_token != stale_token or (not force and time.time() < self.expires_at):
+                return self.access_token
+            logger.info('Refreshing access token')
+            try:
+                token = self.client.refresh_access_token(refresh_token=self.refresh_token)
+            except Exception:
+                self.failures += 1
+                raise
+            self._set_token(token.access_token, time.time() + token.expires_in)
+            self.save()
+            self.refreshes += 1
+            logger.info(f'Successfully refreshed access token, valid until {self.expire_datetime:%H:%M:%S}')
+            return self.access_token
+
+    def _set_token(self, access_token: str, expires_at: float):
+        self.access_token = access_token
+        self.expires_at = expires_at
+        self.client.access_token = access_token
+        self._schedule(delay=expires_at - self.refresh_margin - time.time())
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        if delay <= 0:
+            self._timer = None
+            return
+        self._timer = Timer(delay, self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f'Background access token refresh failed, retrying in {self.retry_delay}s: {e!r}')
+            if time.time() + self.retry_delay < self.expires_at:
+                self._schedule(delay=self.retry_delay)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from logger import logger
+from youtube_api.models import Video
+from youtube_api.src.MetadataBackend import MetadataBackend
+
+YDL_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'extract_flat': 'in_playlist',
+}
+
+
+class YtDlpBackend(MetadataBackend):
+    name = 'ytdlp'
+
+    def __init__(self, known_videos: int = 5000):
+        super().__init__()
+        self.known_videos = known_videos
+        self._known: OrderedDict[str, Video] = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _extract(url: str, **options) -> dict:
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(YDL_OPTIONS | options) as ydl:
+            return ydl.extract_info(url, download=False)
+
+    def _remember(self, entries: list[dict]) -> list[str]:
+        video_ids = []
+        with self._lock:
+            for entry in entries:
+                if not entry or not entry.get('id'):
+                    continue
+                video_ids.append(entry['id'])
+                if entry.get('duration') is None or entry.get('title') is None:
+                    continue
+                thumbnails = entry.get('thumbnails') or [{}]
+                self._known[entry['id']] = Video(
+                    id=entry['id'],
+                    title=entry['title'],
+                    duration=int(entry['duration']),
+                    thumbnail_url=thumbnails[0].get('url'),
+                )
+                self._known.move_to_end(entry['id'])
+            while len(self._known) > self.known_videos:
+                self._known.popitem(last=False)
+        return video_ids
+
+    def search(self, query: str, region_code: str, max_results: int) -> list[str]:
+        info = self._extract(f'ytsearch{max_results}:{query}')
+        return self._remember(info.get('entries') or [])
+
+    def playlist_page(self, playlist_id: str, page_size: int, page_token: Optional[str]) -> tuple[list[str], Optional[str]]:
+        offset = int(page_token or 0)
+        info = self._extract(
+            f'https://www.youtube.com/playlist?list={playlist_id}',
+            playliststart=offset + 1,
+            playlistend=offset + page_size,
+        )
+        entries = list(info.get('entries') or [])
+        next_page_token = str(offset + len(entries)) if len(entries) == page_size else None
+        return self._remember(entries), next_page_token
+
+    def playlist_offset_token(self, offset: int) -> Optional[str]:
+        return str(offset)
+
+    def videos(self, video_ids: list[str]) -> list[Video]:
+        from yt_dlp.utils import DownloadError
+
+        videos = []
+        for video_id in video_ids:
+            with self._lock:
+                video = self._known.get(video_id)
+            if video is None:
+                try:
+                    info = self._extract(Video(id=video_id).url, extract_flat=False, noplaylist=True)
+                except DownloadError as e:
+                    logger.warning(f'yt-dlp could not resolve video {video_id}: {e}')
+                    continue
+                video = Video(
+                    id=info['id'],
+                    title=info.get('title'),
+                    duration=int(info.get('duration') or 0),
+                    thumbnail_url=info.get('thumbnail'),
+                )
+            videos.append(video)
+        return videos
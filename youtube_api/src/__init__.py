@@ -0,0 +1,8 @@
+from .PrioritySemaphore import PrioritySemaphore
+from .AudioCache import AudioCache
+from .MetadataCache import MetadataCache
+from .TokenManager import TokenManager
+from .MetadataBackend import MetadataBackend, QuotaExceeded
+from .DataApiBackend import DataApiBackend
+from .YtDlpBackend import YtDlpBackend
+from .MetadataRouter import MetadataRouter